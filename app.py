@@ -1,9 +1,12 @@
 from pathlib import Path
 from typing import Dict, List
 
-from flask import Flask, render_template
+import click
+from flask import Flask, jsonify, make_response, render_template, request
 
-from projects_types import load_project_types
+from projects_types import format_startup_report, load_project_types
+from projects_types.http_cache import add_validators, is_static_export, make_etag, not_modified
+from projects_types.metrics import init_metrics, metrics_response
 
 
 app = Flask(__name__)
@@ -13,12 +16,21 @@ BASE_PATH = Path(__file__).parent
 app.config['PROJECTS_DIR'] = BASE_PATH / 'projects'
 app.config['PROJECTS_BASE_DIR'] = app.config['PROJECTS_DIR']
 app.config['PROJECT_TYPE_CONFIGS_DIR'] = BASE_PATH / 'projects_types_configs'
+app.config['PROJECT_TYPES_RELOAD_INTERVAL'] = 2.0
+app.config['METRICS_SERVER_TIMING'] = True
+app.config['ASGI_THREADS'] = 16
+app.config['ASGI_SUBAPP_THREADS'] = 8
+# FLASK_<NAME> environment variables override any of the settings above
+app.config.from_prefixed_env()
 
-project_types = load_project_types(app, app.config['PROJECT_TYPE_CONFIGS_DIR'])
+app.jinja_env.globals['static_export'] = is_static_export
+
+init_metrics(app)
+load_project_types(app, app.config['PROJECT_TYPE_CONFIGS_DIR'])
 
 
 def _projects_for(identifier: str) -> List[Dict[str, str]]:
-    project_type = project_types.get(identifier)
+    project_type = app.extensions['project_types'].get(identifier)
     if not project_type:
         return []
     return project_type.list_projects()
@@ -31,11 +43,117 @@ def index():
     md_projects = _projects_for('markdown')
     notion_projects = _projects_for('notion')
     static_projects = _projects_for('static')
-    return render_template('index.html',
-                           flask_projects=flask_projects,
-                           md_projects=md_projects,
-                           notion_projects=notion_projects,
-                           static_projects=static_projects)
+
+    # listings come from each type's catalog cache, so this costs a few stats
+    etag = make_etag('index', flask_projects, md_projects, notion_projects, static_projects)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+    response = make_response(render_template('index.html',
+                                             flask_projects=flask_projects,
+                                             md_projects=md_projects,
+                                             notion_projects=notion_projects,
+                                             static_projects=static_projects))
+    return add_validators(response, etag)
+
+
+@app.route('/search')
+def search():
+    """full-text search across every project type"""
+    query = request.args.get('q', '').strip()
+    results = []
+    indexing = []
+    if query:
+        ranked = []
+        for type_order, project_type in enumerate(app.extensions['project_types'].values()):
+            # BM25 scores of separate indexes are not comparable: merge by the
+            # rank of each hit within its own type, types taking turns
+            for position, result in enumerate(project_type.search(query)):
+                ranked.append((position, type_order, result))
+            # an index still on its first build answers with what it has so far
+            if not project_type.search_ready():
+                indexing.append(project_type.label)
+        ranked.sort(key=lambda entry: entry[:2])
+        results = [result for _, _, result in ranked[:50]]
+
+    if request.args.get('format') == 'json':
+        return jsonify(
+            query=query,
+            indexing=indexing,
+            results=[dict(result, snippet=str(result['snippet'])) for result in results],
+        )
+    return render_template('search.html', query=query, results=results, indexing=indexing)
+
+
+@app.route('/metrics')
+def metrics():
+    """per-phase timings and cache hit rates in the prometheus text format"""
+    return metrics_response(app)
+
+
+@app.cli.command('build')
+@click.option('--output', '-o', default='build', show_default=True,
+              type=click.Path(file_okay=False, path_type=Path),
+              help='directory receiving the static site')
+@click.option('--jobs', '-j', type=int, default=None,
+              help='rendering processes (default: one per CPU)')
+@click.option('--full', is_flag=True, help='ignore the previous build and render everything')
+def build(output: Path, jobs: int, full: bool):
+    """pre-render markdown, notion and static projects into a static site"""
+    from projects_types.export import export_site
+
+    report = export_site(app, f'{__name__}:app', output, jobs=jobs, full=full)
+    click.echo(f'{len(report.rendered)} rendered, {len(report.unchanged)} unchanged, '
+               f'{len(report.removed)} removed -> {output}')
+    for url, outcome in report.failed:
+        click.echo(f'failed: {url} ({outcome})', err=True)
+    if report.failed:
+        raise SystemExit(1)
+
+
+@app.cli.command('warm')
+@click.option('--jobs', '-j', type=int, default=None,
+              help='rendering processes (default: one per CPU)')
+@click.option('--type', 'identifiers', multiple=True,
+              help='only warm this project type (repeatable)')
+def warm(jobs: int, identifiers: List[str]):
+    """render markdown and notion pages into the shared cache before serving"""
+    from projects_types.warmup import warm_shared_caches
+
+    report = warm_shared_caches(app, f'{__name__}:app', jobs=jobs, identifiers=identifiers)
+    click.echo(f'{len(report.computed)} rendered, {len(report.stored)} already stored')
+    for path, error in report.failed:
+        click.echo(f'failed: {path} ({error})', err=True)
+    if report.failed:
+        raise SystemExit(1)
+
+
+@app.cli.command('serve')
+@click.option('--host', '-h', default='0.0.0.0', show_default=True)
+@click.option('--port', '-p', default=5000, show_default=True, type=int)
+@click.option('--workers', '-w', type=int, default=None,
+              help='worker processes (default: one per CPU)')
+@click.option('--threads', '-t', type=int, default=8, show_default=True,
+              help='request threads per worker')
+@click.option('--timeout', type=float, default=30, show_default=True,
+              help='seconds before a silent worker is restarted (gunicorn), '
+                   'or a connection may stay idle (built-in server)')
+@click.option('--graceful-timeout', type=float, default=30, show_default=True,
+              help='seconds workers get to finish their requests on shutdown')
+@click.option('--no-preload', is_flag=True, help='do not warm caches before forking')
+def serve(host: str, port: int, workers: int, threads: int, timeout: float,
+          graceful_timeout: float, no_preload: bool):
+    """run the portal under gunicorn (built-in HTTP/1.0 server if it is missing)"""
+    from projects_types.server import serve as run_server
+
+    run_server(app, host, port, workers=workers, threads=threads, timeout=timeout,
+               graceful_timeout=graceful_timeout, preload=not no_preload)
+
+
+@app.cli.command('startup-report')
+def startup_report():
+    """show how long each project type took to load"""
+    click.echo(format_startup_report(app.extensions['project_types_startup']))
 
 
 @app.errorhandler(404)
@@ -51,6 +169,6 @@ def server_error(e):
 
 
 if __name__ == '__main__':
-    for project_type in project_types.values():
-        project_type.ensure_environment()
+    # load_project_types already prepared every type's environment
+    print(format_startup_report(app.extensions['project_types_startup']))
     app.run(debug=True, host='0.0.0.0', port=5000)
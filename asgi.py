@@ -0,0 +1,6 @@
+"""ASGI entry point: ``uvicorn asgi:application`` (or hypercorn, granian, ...)."""
+
+from app import app
+from projects_types.asgi import create_asgi_app
+
+application = create_asgi_app(app)
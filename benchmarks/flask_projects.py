@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Benchmark for hosted Flask projects.
+Compares requests per second with and without the loaded-application cache.
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def measure(client, url, requests_count):
+    """Issue requests_count GET requests and return the achieved rate."""
+    started = time.perf_counter()
+    for _ in range(requests_count):
+        response = client.get(url)
+        response.close()
+    elapsed = time.perf_counter() - started
+    return requests_count / elapsed if elapsed else float("inf")
+
+
+def main():
+    """Run the benchmark against the first Flask project found."""
+    from app import app
+
+    flask_type = app.extensions["project_types"].get("flask")
+    if flask_type is None:
+        print("✗ Flask project type is not configured")
+        return 1
+
+    projects = flask_type.list_projects()
+    if not projects:
+        print(f"✗ No Flask project found in {flask_type.projects_dir}")
+        return 1
+
+    requests_count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    url = f"/flask/{projects[0]['id']}/"
+    client = app.test_client()
+
+    print("=" * 60)
+    print(f"Flask sub-application benchmark ({requests_count} requests on {url})")
+    print("=" * 60)
+
+    flask_type.cache_apps = False
+    uncached = measure(client, url, requests_count)
+    print(f"without cache: {uncached:10.1f} req/s")
+
+    flask_type.cache_apps = True
+    flask_type.invalidate_project()
+    cached = measure(client, url, requests_count)
+    print(f"with cache:    {cached:10.1f} req/s")
+
+    print(f"speedup:       {cached / uncached:10.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
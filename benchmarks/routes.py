@@ -0,0 +1,500 @@
+#!/usr/bin/env python3
+"""
+Request-level benchmark of every project type.
+
+Generates a synthetic corpus (Markdown, Notion, static and Flask projects)
+at the requested scale, points the application at it and drives the real
+routes through the WSGI interface. Each route runs in a fresh process so
+its peak RSS is its own. Reports cold latency, p50/p99 latency, throughput
+and peak RSS per route, optionally as JSON, and compares against a previous
+JSON report to flag regressions.
+
+    python benchmarks/routes.py --scale medium --json results.json
+    python benchmarks/routes.py --scale medium --compare results.json
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import yaml
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+SCALES = {
+    # projects per type; pages, CSV rows, static files and Flask routes of the largest project
+    "small": dict(projects=5, pages=50, depth=2, csv_rows=[1_000], static_files=50, flask_routes=50),
+    "medium": dict(
+        projects=20, pages=500, depth=3, csv_rows=[1_000, 100_000], static_files=300, flask_routes=200
+    ),
+    "large": dict(
+        projects=50, pages=2_000, depth=4, csv_rows=[1_000, 100_000], static_files=1_000, flask_routes=500
+    ),
+}
+# pages of every project but the largest one
+SMALL_PROJECT_PAGES = 10
+WORDS = (
+    "projet page rendu cache index arbre serveur route fichier dossier tableau valeur "
+    "requête réponse latence gabarit module fonction classe méthode paramètre benchmark"
+).split()
+
+
+# ---------------------------------------------------------------------------
+# corpus
+
+
+def _sentence(rng, words=12):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def _markdown_page(rng, title):
+    rows = "\n".join(f"| {rng.choice(WORDS)} | {rng.randint(0, 999)} | {_sentence(rng, 4)} |" for _ in range(8))
+    return f"""# {title}
+
+{_sentence(rng, 40)} {_sentence(rng, 30)}
+
+## Section
+
+- {_sentence(rng, 6)}
+- {_sentence(rng, 6)}
+- {_sentence(rng, 6)}
+
+```python
+def {rng.choice(WORDS)}_{rng.randint(0, 99)}(value):
+    return value * {rng.randint(2, 9)}
+```
+
+| nom | valeur | description |
+| --- | --- | --- |
+{rows}
+
+### Détails
+
+{_sentence(rng, 50)}
+"""
+
+
+def _nested_path(index, depth):
+    """Spread pages over ``depth`` levels of folders, a handful of entries per folder."""
+    parts = [f"section-{(index // 7 ** level) % 7}" for level in range(depth, 0, -1)]
+    return Path(*parts, f"page-{index}.md")
+
+
+def _write_config(project_dir, name):
+    (project_dir / ".mph-config").write_text(f"name: {name}\nemoji: \"🧪\"\n", encoding="utf-8")
+
+
+def _write_markdown_project(project_dir, rng, pages, depth):
+    project_dir.mkdir(parents=True)
+    _write_config(project_dir, project_dir.name.title())
+    (project_dir / "index.md").write_text(_markdown_page(rng, "Accueil"), encoding="utf-8")
+    deepest = None
+    for index in range(pages):
+        path = project_dir / _nested_path(index, depth)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(_markdown_page(rng, f"Page {index}"), encoding="utf-8")
+        deepest = path
+    return deepest.relative_to(project_dir).with_suffix("").as_posix()
+
+
+def _write_csv(path, rng, rows):
+    with path.open("w", encoding="utf-8", newline="") as handle:
+        handle.write("Nom,Statut,Priorité,Montant,Notes\n")
+        for row in range(rows):
+            handle.write(
+                f"Tâche {row},{rng.choice(('À faire', 'En cours', 'Terminé'))},"
+                f"{rng.randint(1, 5)},{rng.random() * 1000:.2f},\"{_sentence(rng, 6)}\"\n"
+            )
+
+
+def _write_static_project(project_dir, rng, files):
+    project_dir.mkdir(parents=True)
+    _write_config(project_dir, project_dir.name.title())
+    (project_dir / "index.html").write_text(
+        "<!DOCTYPE html><html><head><link rel=\"stylesheet\" href=\"css/style.css\"></head>"
+        f"<body><p>{_sentence(rng, 80)}</p></body></html>",
+        encoding="utf-8",
+    )
+    assets = []
+    for index in range(files):
+        folder = project_dir / f"assets-{index % 10}" / f"group-{index % 3}"
+        folder.mkdir(parents=True, exist_ok=True)
+        if index % 3 == 2:
+            path = folder / f"image-{index}.bin"
+            path.write_bytes(rng.randbytes(20_000))
+        else:
+            suffix = ".css" if index % 3 else ".js"
+            path = folder / f"file-{index}{suffix}"
+            path.write_text("\n".join(f"/* {_sentence(rng, 10)} */" for _ in range(60)), encoding="utf-8")
+        assets.append(path.relative_to(project_dir).as_posix())
+    (project_dir / "css").mkdir()
+    (project_dir / "css" / "style.css").write_text("body { margin: 0; }\n" * 200, encoding="utf-8")
+    return assets
+
+
+FLASK_APP_TEMPLATE = '''from flask import Flask, jsonify, render_template_string
+
+app = Flask(__name__)
+
+ROWS = [{{"id": i, "name": f"ligne {{i}}", "value": i * 7 % 101}} for i in range(500)]
+TABLE = """<table>{{% for row in rows %}}<tr><td>{{{{ row.id }}}}</td><td>{{{{ row.name }}}}</td>
+<td>{{{{ row.value }}}}</td></tr>{{% endfor %}}</table>"""
+
+
+@app.route("/")
+def index():
+    return render_template_string(TABLE, rows=ROWS)
+
+
+@app.route("/api")
+def api():
+    return jsonify(rows=ROWS[:100])
+
+
+def _make_view(number):
+    def view():
+        return f"route {{number}}"
+    return view
+
+
+for number in range({routes}):
+    app.add_url_rule(f"/route-{{number}}", f"route_{{number}}", _make_view(number))
+'''
+
+
+def _write_flask_project(project_dir, routes):
+    project_dir.mkdir(parents=True)
+    _write_config(project_dir, project_dir.name.title())
+    (project_dir / "app.py").write_text(FLASK_APP_TEMPLATE.format(routes=routes), encoding="utf-8")
+
+
+def generate_corpus(root, scale, seed=0):
+    """Write the projects and type configs of ``scale`` under ``root``; returns the routes to measure."""
+    settings = SCALES[scale]
+    rng = random.Random(seed)
+    projects_root = root / "projects"
+    configs_dir = root / "configs"
+    configs_dir.mkdir(parents=True)
+
+    for config_file in sorted((REPO_ROOT / "projects_types_configs").glob("*.y*ml")):
+        config = yaml.safe_load(config_file.read_text(encoding="utf-8")) or {}
+        identifier = config.get("identifier") or config.get("type")
+        config["projects_dir"] = str(projects_root / identifier)
+        # keep indexes and compressed variants out of the repository's instance folder
+        if "search" in config:
+            config["search"]["index_path"] = str(root / "instance" / f"{identifier}.sqlite3")
+        if "compression" in config:
+            config["compression"]["cache_dir"] = str(root / "instance" / "static-cache")
+        if config.get("shared_cache"):
+            config["shared_cache"]["path"] = str(root / "instance" / "shared" / f"{identifier}.sqlite3")
+        (configs_dir / config_file.name).write_text(yaml.safe_dump(config, allow_unicode=True), encoding="utf-8")
+
+    largest = "projet-0"
+    for number in range(settings["projects"]):
+        pages = settings["pages"] if number == 0 else SMALL_PROJECT_PAGES
+        name = f"projet-{number}"
+        page = _write_markdown_project(projects_root / "markdown" / name, rng, pages, settings["depth"])
+        notion_page = _write_markdown_project(projects_root / "notion" / name, rng, pages // 2 or 1, settings["depth"])
+        if number == 0:
+            deep_page, deep_notion_page = page, notion_page
+            for rows in settings["csv_rows"]:
+                _write_csv(projects_root / "notion" / name / f"Base {rows}.csv", rng, rows)
+        assets = _write_static_project(
+            projects_root / "static" / name, rng, settings["static_files"] if number == 0 else 5
+        )
+        if number == 0:
+            deep_asset = next(asset for asset in reversed(assets) if asset.endswith(".js"))
+        _write_flask_project(projects_root / "flask" / name, settings["flask_routes"] if number == 0 else 5)
+
+    xhr = {"X-Requested-With": "XMLHttpRequest", "Accept": "application/json"}
+    routes = [
+        dict(name="home", path="/"),
+        dict(name="md_list", path="/md"),
+        dict(name="md_page", path=f"/md/{largest}/{deep_page}"),
+        dict(name="md_page_fragment", path=f"/md/{largest}/{deep_page}", headers=xhr),
+        dict(name="md_page_revalidate", path=f"/md/{largest}/{deep_page}", revalidate=True),
+        dict(name="notion_page", path=f"/notion/{largest}/{deep_notion_page}"),
+        dict(name="static_asset", path=f"/static-projects/{largest}/{deep_asset}"),
+        dict(
+            name="static_asset_gzip",
+            path=f"/static-projects/{largest}/{deep_asset}",
+            headers={"Accept-Encoding": "gzip"},
+        ),
+        dict(name="flask_page", path=f"/flask/{largest}/"),
+        dict(name="flask_api", path=f"/flask/{largest}/api"),
+        dict(name="search", path="/search?q=latence+gabarit"),
+    ]
+    for rows in settings["csv_rows"]:
+        database = f"/notion/{largest}/Base%20{rows}"
+        routes.append(dict(name=f"notion_csv_{rows}", path=f"{database}?page=3"))
+        routes.append(dict(name=f"notion_csv_{rows}_sorted", path=f"{database}?sort=Montant&order=desc"))
+    return routes
+
+
+# ---------------------------------------------------------------------------
+# measurement (one process per route)
+
+
+def _peak_rss_kb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, kilobytes elsewhere
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    position = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[position]
+
+
+def run_route(spec):
+    """Import the app, warm the route up and time ``spec["requests"]`` WSGI calls of it.
+
+    A route that is still running after ``spec["budget"]`` seconds stops
+    early and reports the requests it managed, so one slow route does not
+    hold up the whole run.
+    """
+    from werkzeug.test import EnvironBuilder
+
+    started = time.perf_counter()
+    from app import app
+
+    import_ms = (time.perf_counter() - started) * 1000
+
+    path, _, query = spec["path"].partition("?")
+    builder = EnvironBuilder(path=path, query_string=query, headers=spec.get("headers") or {})
+    base_environ = builder.get_environ()
+    builder.close()
+    statuses = {}
+
+    def call(extra_headers=None):
+        environ = dict(base_environ)
+        environ["wsgi.input"] = io.BytesIO()
+        environ.update(extra_headers or {})
+        captured = {}
+
+        def start_response(status, headers, exc_info=None):
+            captured["status"] = status
+            captured["headers"] = headers
+
+        result = app(environ, start_response)
+        try:
+            size = sum(len(chunk) for chunk in result)
+        finally:
+            if hasattr(result, "close"):
+                result.close()
+        status = captured["status"].split(" ", 1)[0]
+        statuses[status] = statuses.get(status, 0) + 1
+        return captured["headers"], size
+
+    cold_started = time.perf_counter()
+    headers, size = call()
+    cold_ms = (time.perf_counter() - cold_started) * 1000
+
+    extra = {}
+    if spec.get("revalidate"):
+        etag = dict(headers).get("ETag")
+        if etag:
+            extra["HTTP_IF_NONE_MATCH"] = etag
+    deadline = time.perf_counter() + spec["budget"]
+    for _ in range(spec["warmup"]):
+        if time.perf_counter() > deadline:
+            break
+        call(extra)
+    statuses.clear()
+
+    latencies = []
+    measure_started = time.perf_counter()
+    for _ in range(spec["requests"]):
+        request_started = time.perf_counter()
+        call(extra)
+        latencies.append((time.perf_counter() - request_started) * 1000)
+        if request_started > deadline:
+            break
+    elapsed = time.perf_counter() - measure_started
+    latencies.sort()
+
+    return {
+        "name": spec["name"],
+        "path": spec["path"],
+        "requests": len(latencies),
+        "budget_exceeded": len(latencies) < spec["requests"],
+        "statuses": statuses,
+        "response_bytes": size,
+        "import_ms": round(import_ms, 3),
+        "cold_ms": round(cold_ms, 3),
+        "p50_ms": round(_percentile(latencies, 0.50), 3),
+        "p99_ms": round(_percentile(latencies, 0.99), 3),
+        "mean_ms": round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+        "requests_per_second": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "peak_rss_kb": _peak_rss_kb(),
+    }
+
+
+def _run_in_subprocess(spec, corpus_root):
+    env = dict(os.environ)
+    env["FLASK_PROJECT_TYPE_CONFIGS_DIR"] = str(corpus_root / "configs")
+    env["FLASK_PROJECTS_DIR"] = str(corpus_root / "projects")
+    env["FLASK_PROJECTS_BASE_DIR"] = str(corpus_root / "projects")
+    completed = subprocess.run(
+        [sys.executable, __file__, "--worker", json.dumps(spec)],
+        cwd=REPO_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if completed.returncode != 0:
+        return {"name": spec["name"], "path": spec["path"], "error": completed.stderr.strip()[-2000:]}
+    # the application may print while loading: the result is the last line
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+# ---------------------------------------------------------------------------
+# reporting
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ["git", "describe", "--always", "--dirty"],
+            cwd=REPO_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(report):
+    print("=" * 96)
+    print(f"Route benchmark — scale {report['scale']}, {report['requests']} requests per route")
+    print("=" * 96)
+    print(f"{'route':<26}{'status':>10}{'cold ms':>10}{'p50 ms':>10}{'p99 ms':>10}{'req/s':>11}{'peak RSS MB':>14}")
+    for result in report["results"]:
+        if "error" in result:
+            print(f"{result['name']:<26}  ✗ {result['error'].splitlines()[-1]}")
+            continue
+        statuses = "/".join(sorted(result["statuses"]))
+        if result["budget_exceeded"]:
+            statuses = f"{statuses} ({result['requests']})"
+        print(
+            f"{result['name']:<26}{statuses:>10}{result['cold_ms']:>10.2f}{result['p50_ms']:>10.3f}"
+            f"{result['p99_ms']:>10.3f}{result['requests_per_second']:>11.1f}"
+            f"{result['peak_rss_kb'] / 1024:>14.1f}"
+        )
+
+
+def compare_reports(report, baseline, threshold):
+    """Print p50/p99 changes against ``baseline``; returns the names of the routes that regressed."""
+    previous = {result["name"]: result for result in baseline.get("results", []) if "error" not in result}
+    regressions = []
+    print()
+    print(f"Compared with {baseline.get('revision') or 'baseline'} (regression above +{threshold:.0f}%)")
+    for result in report["results"]:
+        before = previous.get(result["name"])
+        if before is None or "error" in result:
+            continue
+        changes = []
+        regressed = False
+        for metric in ("p50_ms", "p99_ms"):
+            if before[metric]:
+                change = (result[metric] - before[metric]) / before[metric] * 100
+                changes.append(f"{metric[:3]} {change:+6.1f}%")
+                regressed = regressed or change > threshold
+        marker = "✗" if regressed else "✓"
+        print(f"{marker} {result['name']:<26}{'  '.join(changes)}")
+        if regressed:
+            regressions.append(result["name"])
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--requests", type=int, default=200, help="timed requests per route")
+    parser.add_argument("--warmup", type=int, default=20, help="untimed requests per route after the first")
+    parser.add_argument("--budget", type=float, default=60.0, help="seconds after which a route stops early")
+    parser.add_argument("--routes", nargs="*", help="only run these routes (names from the report)")
+    parser.add_argument("--corpus", type=Path, help="keep the generated corpus in this directory and reuse it")
+    parser.add_argument("--json", type=Path, help="write the report to this file")
+    parser.add_argument("--compare", type=Path, help="previous JSON report to compare with")
+    parser.add_argument("--threshold", type=float, default=20.0, help="regression threshold in percent")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_route(json.loads(args.worker))))
+        return 0
+
+    temporary = None
+    corpus_root = args.corpus
+    if corpus_root is None:
+        temporary = corpus_root = Path(tempfile.mkdtemp(prefix="mph-bench-"))
+    try:
+        manifest_path = corpus_root / "routes.json"
+        if manifest_path.is_file():
+            manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+            if manifest["scale"] != args.scale or manifest["seed"] != args.seed:
+                print(f"✗ {corpus_root} holds a '{manifest['scale']}' corpus, remove it or pick another directory")
+                return 1
+            routes = manifest["routes"]
+        else:
+            started = time.perf_counter()
+            corpus_root.mkdir(parents=True, exist_ok=True)
+            routes = generate_corpus(corpus_root, args.scale, args.seed)
+            manifest_path.write_text(
+                json.dumps({"scale": args.scale, "seed": args.seed, "routes": routes}), encoding="utf-8"
+            )
+            print(f"corpus '{args.scale}' generated in {time.perf_counter() - started:.1f}s ({corpus_root})")
+
+        if args.routes:
+            routes = [route for route in routes if route["name"] in args.routes]
+
+        results = []
+        for route in routes:
+            spec = dict(route, requests=args.requests, warmup=args.warmup, budget=args.budget)
+            # "cold" means nothing rendered yet, not even by the previous route
+            shutil.rmtree(corpus_root / "instance" / "shared", ignore_errors=True)
+            results.append(_run_in_subprocess(spec, corpus_root))
+
+        report = {
+            "revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "scale": args.scale,
+            "settings": SCALES[args.scale],
+            "requests": args.requests,
+            "warmup": args.warmup,
+            "results": results,
+        }
+        print_report(report)
+        if args.json:
+            args.json.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+            print(f"\nreport written to {args.json}")
+
+        failed = [result["name"] for result in results if "error" in result]
+        if args.compare:
+            baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+            failed += compare_reports(report, baseline, args.threshold)
+        return 1 if failed else 0
+    finally:
+        if temporary is not None:
+            shutil.rmtree(temporary, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
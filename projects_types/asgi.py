@@ -0,0 +1,280 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import SpooledTemporaryFile
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from flask import Flask
+
+from .server import preload_app
+
+
+DEFAULT_THREADS = 16
+DEFAULT_SUBAPP_THREADS = 8
+# request bodies above this size are spooled to a temporary file
+DEFAULT_MAX_MEMORY_BODY = 1024 * 1024
+# bytes gathered from a streamed WSGI body per trip to the thread pool
+BATCH_SIZE = 64 * 1024
+FILE_BLOCK_SIZE = 256 * 1024
+
+Message = Dict[str, Any]
+Receive = Callable[[], Any]
+Send = Callable[[Message], Any]
+
+
+class AsgiFileWrapper:
+    """``wsgi.file_wrapper`` of the ASGI bridge: the file is sent from the event loop.
+
+    ``FileDelivery`` hands over files positioned at the first byte to send;
+    the bridge then uses the server's zero-copy extension when it has one,
+    and reads blocks on the thread pool otherwise. Iterating it (a WSGI
+    middleware that does not know about it) still works.
+    """
+
+    def __init__(self, filelike, block_size: int = FILE_BLOCK_SIZE) -> None:
+        self.filelike = filelike
+        self.block_size = block_size
+
+    def __iter__(self):
+        while True:
+            chunk = self.filelike.read(self.block_size)
+            if not chunk:
+                return
+            yield chunk
+
+    def close(self) -> None:
+        self.filelike.close()
+
+
+def build_environ(scope: Dict[str, Any], body) -> Dict[str, Any]:
+    """Translate an ASGI HTTP scope into a WSGI environ (PEP 3333 string rules)."""
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client")
+    environ: Dict[str, Any] = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": str(server[0]),
+        "SERVER_PORT": str(server[1]) if server[1] is not None else "80",
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": body,
+        "wsgi.input_terminated": True,
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+        "wsgi.file_wrapper": AsgiFileWrapper,
+        "asgi.scope": scope,
+    }
+    if client:
+        environ["REMOTE_ADDR"] = str(client[0])
+        environ["REMOTE_PORT"] = str(client[1])
+
+    for raw_name, raw_value in scope.get("headers", []):
+        name = raw_name.decode("latin-1").upper().replace("-", "_")
+        value = raw_value.decode("latin-1")
+        if name == "CONTENT_TYPE" or name == "CONTENT_LENGTH":
+            key = name
+        else:
+            key = f"HTTP_{name}"
+        if key in environ:
+            environ[key] += ("; " if key == "HTTP_COOKIE" else ",") + value
+        else:
+            environ[key] = value
+    return environ
+
+
+def _next_batch(iterator) -> Tuple[List[bytes], bool]:
+    """Pull chunks until ``BATCH_SIZE`` bytes are gathered; ``True`` once exhausted."""
+    chunks: List[bytes] = []
+    gathered = 0
+    for chunk in iterator:
+        if chunk:
+            chunks.append(chunk)
+            gathered += len(chunk)
+            if gathered >= BATCH_SIZE:
+                return chunks, False
+    return chunks, True
+
+
+class AsgiBridge:
+    """ASGI application serving the portal's WSGI stack from a bounded thread pool.
+
+    Connections are handled by coroutines: a slow client uploading a body or
+    reading a response only holds a coroutine, and a thread is used only
+    while the Flask application actually runs. Request bodies are received
+    on the event loop before dispatch, response bodies are sent from it.
+    Files handed to ``wsgi.file_wrapper`` (static projects) are sent without
+    going back to the application: through the server's
+    ``http.response.zerocopysend`` or ``http.response.pathsend`` extension
+    when available, else in blocks read on the pool.
+
+    Requests under a Flask project's mount path run on a separate pool so
+    slow sub-applications cannot starve the portal's own pages.
+    """
+
+    def __init__(
+        self,
+        app: Flask,
+        threads: int = DEFAULT_THREADS,
+        subapp_threads: int = DEFAULT_SUBAPP_THREADS,
+        max_memory_body: int = DEFAULT_MAX_MEMORY_BODY,
+    ) -> None:
+        self.app = app
+        self.max_memory_body = int(max_memory_body)
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="asgi")
+        self.subapp_executor = ThreadPoolExecutor(
+            max_workers=subapp_threads, thread_name_prefix="asgi-subapp"
+        )
+
+    def _executor_for(self, path: str) -> ThreadPoolExecutor:
+        for project_type in self.app.extensions.get("project_types", {}).values():
+            mount_path = getattr(project_type, "mount_path", None)
+            if mount_path and path.startswith(f"{mount_path}/"):
+                return self.subapp_executor
+        return self.executor
+
+    async def __call__(self, scope: Dict[str, Any], receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            await self._http(scope, receive, send)
+        elif scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "websocket":
+            await send({"type": "websocket.close", "code": 1000})
+
+    async def _lifespan(self, receive: Receive, send: Send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                # stored renderings and file indexes, before the first request
+                await asyncio.get_running_loop().run_in_executor(self.executor, preload_app, self.app)
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self.close()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.subapp_executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _read_body(self, receive: Receive) -> Optional[SpooledTemporaryFile]:
+        body = SpooledTemporaryFile(max_size=self.max_memory_body)
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                body.close()
+                return None
+            body.write(message.get("body", b""))
+            if not message.get("more_body", False):
+                body.seek(0)
+                return body
+
+    async def _http(self, scope: Dict[str, Any], receive: Receive, send: Send) -> None:
+        body = await self._read_body(receive)
+        if body is None:
+            return
+
+        loop = asyncio.get_running_loop()
+        executor = self._executor_for(scope["path"])
+        # one context per request: a streamed response resumed on another
+        # thread still sees the request context its generator pushed
+        context = contextvars.copy_context()
+        environ = build_environ(scope, body)
+        response_start: Dict[str, Any] = {}
+
+        def start_response(status: str, headers: List[Tuple[str, str]], exc_info=None):
+            if exc_info and response_start.get("sent"):
+                raise exc_info[1].with_traceback(exc_info[2])
+            response_start["status"] = int(status.split(" ", 1)[0])
+            response_start["headers"] = [
+                (name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers
+            ]
+
+        def run(function, *args):
+            return loop.run_in_executor(executor, context.run, function, *args)
+
+        result: Iterable[bytes] = ()
+        try:
+            result = await run(self.app, environ, start_response)
+            if isinstance(result, AsgiFileWrapper):
+                await self._send_start(send, response_start)
+                await self._send_file(result, response_start, scope, send, run)
+                return
+
+            if isinstance(result, (list, tuple)):
+                chunks, finished = [chunk for chunk in result if chunk], True
+                iterator = None
+            else:
+                iterator = iter(result)
+                chunks, finished = await run(_next_batch, iterator)
+            await self._send_start(send, response_start)
+            while True:
+                await send(
+                    {"type": "http.response.body", "body": b"".join(chunks), "more_body": not finished}
+                )
+                if finished:
+                    return
+                chunks, finished = await run(_next_batch, iterator)
+        finally:
+            close = getattr(result, "close", None)
+            if close is not None:
+                await run(close)
+            body.close()
+
+    @staticmethod
+    async def _send_start(send: Send, response_start: Dict[str, Any]) -> None:
+        response_start["sent"] = True
+        await send(
+            {
+                "type": "http.response.start",
+                "status": response_start["status"],
+                "headers": response_start["headers"],
+            }
+        )
+
+    @staticmethod
+    async def _send_file(wrapper: AsgiFileWrapper, response_start, scope, send: Send, run) -> None:
+        handle = wrapper.filelike
+        offset = handle.tell()
+        size = os.fstat(handle.fileno()).st_size
+        count = size - offset
+        for name, value in response_start["headers"]:
+            if name == b"content-length":
+                count = int(value)
+        extensions = scope.get("extensions") or {}
+
+        if "http.response.zerocopysend" in extensions:
+            await send(
+                {"type": "http.response.zerocopysend", "file": handle.fileno(), "offset": offset, "count": count}
+            )
+            return
+        if "http.response.pathsend" in extensions and offset == 0 and count == size:
+            await send({"type": "http.response.pathsend", "path": os.path.abspath(handle.name)})
+            return
+
+        remaining = count
+        while True:
+            chunk = await run(handle.read, min(wrapper.block_size, remaining)) if remaining > 0 else b""
+            remaining -= len(chunk)
+            finished = not chunk or remaining <= 0
+            await send({"type": "http.response.body", "body": chunk, "more_body": not finished})
+            if finished:
+                return
+
+
+def create_asgi_app(app: Flask) -> AsgiBridge:
+    """ASGI entry point of ``app``, sized by ``ASGI_THREADS``/``ASGI_SUBAPP_THREADS``."""
+    return AsgiBridge(
+        app,
+        threads=app.config.get("ASGI_THREADS", DEFAULT_THREADS),
+        subapp_threads=app.config.get("ASGI_SUBAPP_THREADS", DEFAULT_SUBAPP_THREADS),
+        max_memory_body=app.config.get("ASGI_MAX_MEMORY_BODY", DEFAULT_MAX_MEMORY_BODY),
+    )
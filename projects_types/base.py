@@ -1,18 +1,28 @@
 from __future__ import annotations
 
+import threading
+import time
 from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Callable, ClassVar, ContextManager, Dict, List, Optional, Tuple
 
-from flask import Flask
+from flask import Flask, abort, current_app, g, make_response, render_template
 import yaml
 
+from .http_cache import add_validators, make_etag, not_modified
+from .metrics import count_cache, timed
+from .shared_cache import SharedCache, create_shared_cache
+
 
 class ProjectType(ABC):
     """Base helper that encapsulates how a project type integrates with the host app."""
 
     type_name: str = ""
 
+    # config path -> ((mtime_ns, size), parsed config), shared by every project type
+    _config_cache: ClassVar[Dict[Path, Tuple[Tuple[int, int], Dict[str, Any]]]] = {}
+    _config_cache_lock: ClassVar[threading.Lock] = threading.Lock()
+
     def __init__(self, app: Flask, raw_config: Dict[str, Any]) -> None:
         if not raw_config:
             raise ValueError("Project type configuration must not be empty")
@@ -48,6 +58,16 @@ class ProjectType(ABC):
         self.project_config_filename = raw_config.get("project_config_file", ".mph-config")
         self.default_emoji = raw_config.get("default_emoji", "📦")
 
+        # (scanned at, projects_dir mtime, projects) as returned by list_projects
+        self.catalog_ttl = float(raw_config.get("catalog", {}).get("ttl", 5.0))
+        self._catalog: Optional[Tuple[float, Optional[int], List[Dict[str, Any]]]] = None
+        self._catalog_lock = threading.Lock()
+
+        # rendered pages and parsed files shared by every worker of the node
+        self.shared_cache: SharedCache = create_shared_cache(
+            app, identifier, raw_config.get("shared_cache")
+        )
+
     def ensure_environment(self) -> None:
         """Make sure the directory that stores projects for this type exists."""
         self.projects_dir.mkdir(parents=True, exist_ok=True)
@@ -59,30 +79,212 @@ class ProjectType(ABC):
         return self.projects_dir / project_name / self.project_config_filename
 
     def load_project_config(self, project_name: str) -> Dict[str, Any]:
-        """Load the YAML configuration associated with a single project."""
+        """Load the YAML configuration associated with a single project.
+
+        Parsed configs are cached and only re-read when the file's mtime or
+        size changes, so the returned dict is shared and must not be mutated.
+        """
         config_path = self._project_config_path(project_name)
-        if not config_path.exists():
+        try:
+            stat_result = config_path.stat()
+        except OSError:
+            self._config_cache.pop(config_path, None)
             return {}
+        signature = (stat_result.st_mtime_ns, stat_result.st_size)
+
+        cached = self._config_cache.get(config_path)
+        hit = bool(cached and cached[0] == signature)
+        self.record_cache("project_config", hit)
+        if hit:
+            return cached[1]
 
         try:
-            with config_path.open("r", encoding="utf-8") as handle:
-                return yaml.safe_load(handle) or {}
+            with self.timed("config"), config_path.open("r", encoding="utf-8") as handle:
+                project_config = yaml.safe_load(handle) or {}
         except Exception as exc:  # pragma: no cover - defensive logging only
             print(f"Error loading config for {self.identifier}:{project_name}: {exc}")
-            return {}
+            # cached like a valid config: retried once the file changes, not on every call
+            project_config = {}
 
-    def get_project_display_name(self, project_name: str) -> str:
-        project_config = self.load_project_config(project_name)
+        with self._config_cache_lock:
+            self._config_cache[config_path] = (signature, project_config)
+        return project_config
+
+    def project_config_signature(self, project_name: str) -> Optional[Tuple[int, int]]:
+        """(mtime_ns, size) of the project's config as last loaded, ``None`` if it has none."""
+        cached = self._config_cache.get(self._project_config_path(project_name))
+        return cached[0] if cached else None
+
+    def get_project_display_name(
+        self, project_name: str, project_config: Optional[Dict[str, Any]] = None
+    ) -> str:
+        if project_config is None:
+            project_config = self.load_project_config(project_name)
         return project_config.get("name", project_name)
 
-    def get_project_emoji(self, project_name: str) -> str:
-        project_config = self.load_project_config(project_name)
+    def get_project_emoji(
+        self, project_name: str, project_config: Optional[Dict[str, Any]] = None
+    ) -> str:
+        if project_config is None:
+            project_config = self.load_project_config(project_name)
         return project_config.get("emoji", self.default_emoji)
 
-    @abstractmethod
+    def describe_project(self, project_name: str) -> Dict[str, Any]:
+        """Return the id/name/emoji entry used by project listings."""
+        project_config = self.load_project_config(project_name)
+        return {
+            "id": project_name,
+            "name": self.get_project_display_name(project_name, project_config),
+            "emoji": self.get_project_emoji(project_name, project_config),
+        }
+
+    def render_project_list(self, template_name: str):
+        """Render a listing page, answering 304 when the listing has not changed."""
+        projects = self.list_projects()
+        etag = make_etag(self.identifier, template_name, projects)
+        cached = not_modified(etag)
+        if cached is not None:
+            return cached
+        response = make_response(render_template(template_name, projects=projects))
+        return add_validators(response, etag)
+
+    def export_paths(self) -> List[str]:
+        """URL paths ``flask build`` pre-renders for this type; empty keeps it live-only."""
+        return []
+
+    def search(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """Return full-text matches for ``query``; types without searchable content have none."""
+        return []
+
+    def search_ready(self) -> bool:
+        """False while this type's search index is still being built for the first time."""
+        return True
+
     def list_projects(self) -> List[Dict[str, Any]]:
-        """Return the projects handled by this type."""
+        """Return the projects handled by this type, from the catalog cache.
+
+        The catalog is rescanned as soon as the projects directory's mtime
+        changes (a project was added, removed or renamed) and at least every
+        ``catalog.ttl`` seconds to catch edits inside projects (``.mph-config``,
+        entry files). The returned list is shared and must not be mutated.
+        """
+        try:
+            mtime_ns: Optional[int] = self.projects_dir.stat().st_mtime_ns
+        except OSError:
+            mtime_ns = None
+
+        catalog = self._catalog
+        if self._catalog_is_current(catalog, mtime_ns):
+            self.record_cache("catalog", True)
+            return catalog[2]
+
+        with self._catalog_lock:
+            catalog = self._catalog
+            if self._catalog_is_current(catalog, mtime_ns):
+                self.record_cache("catalog", True)
+                return catalog[2]
+            self.record_cache("catalog", False)
+            with self.timed("scan"):
+                projects = self.scan_projects() if mtime_ns is not None else []
+            self._catalog = (time.monotonic(), mtime_ns, projects)
+        return projects
+
+    def _catalog_is_current(self, catalog, mtime_ns: Optional[int]) -> bool:
+        return (
+            catalog is not None
+            and catalog[1] == mtime_ns
+            and time.monotonic() - catalog[0] < self.catalog_ttl
+        )
+
+    def invalidate_catalog(self) -> None:
+        """Forget the cached project list; the next ``list_projects`` rescans."""
+        self._catalog = None
+
+    @abstractmethod
+    def scan_projects(self) -> List[Dict[str, Any]]:
+        """Walk the projects directory and describe every project of this type."""
+
+    def timed(self, phase: str, project_name: Optional[str] = None) -> ContextManager[None]:
+        """Time a phase of the current request for ``/metrics`` and ``Server-Timing``.
+
+        Pass ``project_name`` only once the project is known to exist: it
+        becomes a metrics label for the rest of the request.
+        """
+        return timed(phase, self.identifier, project_name)
+
+    def record_cache(self, cache: str, hit: bool) -> None:
+        count_cache(self.identifier, cache, hit)
+
+    def cache_stats(self) -> Dict[str, Dict[str, int]]:
+        """Hit/miss counts of caches that keep their own (``{name: {"hits", "misses"}}``)."""
+        return {}
+
+    def add_url_rule(
+        self, rule: str, endpoint: Optional[str] = None, view_func: Optional[Callable] = None, **options: Any
+    ) -> None:
+        """Register ``view_func`` (a method of this type) behind a stable indirection.
+
+        The installed view looks the type up by identifier on every request,
+        so reloading its configuration swaps the instance without touching
+        the URL map. Rules a previous instance already registered are kept.
+        """
+        app = self.app
+        endpoint = endpoint or view_func.__name__
+        existing = app.view_functions.get(endpoint)
+        if existing is not None:
+            if getattr(existing, "project_type_identifier", None) != self.identifier:
+                print(f"Skipping route {rule}: endpoint '{endpoint}' already registered")
+            return
+
+        view = _project_type_view(self.identifier, view_func.__name__, endpoint)
+        try:
+            app.add_url_rule(rule, endpoint=endpoint, view_func=view, **options)
+            return
+        except AssertionError:
+            # Flask's setup methods raise once the app served a request, and
+            # it has no public way to add a route after that. A type added by
+            # a configuration reload still needs its routes, so they go into
+            # the URL map directly (Werkzeug's public Map.add), as Flask's
+            # add_url_rule itself would do. Existing rules are never touched.
+            pass
+
+        methods = {method.upper() for method in options.pop("methods", None) or ("GET",)}
+        methods.add("OPTIONS")
+        app.url_map.add(app.url_rule_class(rule, methods=methods, endpoint=endpoint, **options))
+        app.view_functions[endpoint] = view
+
+    def preload(self) -> None:
+        """Warm caches before ``flask serve`` forks, so workers share them copy-on-write."""
+        self.list_projects()
+
+    def warm_sources(self) -> List[Path]:
+        """Files ``flask warm`` prepares in the shared cache, one ``warm`` call each."""
+        return []
+
+    def warm(self, path: Path) -> bool:
+        """Put what serving ``path`` needs in the shared cache; ``False`` if it was already there."""
+        return False
+
+    def after_fork(self) -> None:
+        """Drop state a worker process must not share with the master (sockets, processes)."""
+
+    def close(self) -> None:
+        """Release resources when a configuration reload replaces or removes this type."""
+        self.shared_cache.close()
 
     @abstractmethod
     def register_routes(self) -> None:
-        """Register all HTTP routes that relate to this project type."""
\ No newline at end of file
+        """Register all HTTP routes that relate to this project type."""
+
+
+def _project_type_view(identifier: str, method_name: str, endpoint: str) -> Callable:
+    def view(**kwargs: Any):
+        project_type = current_app.extensions["project_types"].get(identifier)
+        if project_type is None:
+            abort(404)
+        g.metrics_type = identifier
+        return getattr(project_type, method_name)(**kwargs)
+
+    view.__name__ = endpoint
+    view.project_type_identifier = identifier
+    return view
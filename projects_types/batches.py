@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from importlib import import_module
+from typing import Callable, List, Optional, Sequence, TypeVar
+
+from flask import Flask
+
+
+Item = TypeVar("Item")
+Result = TypeVar("Result")
+
+# the application of this process: the caller's with one job, else imported once per worker
+_worker_app: Optional[Flask] = None
+
+
+def load_app(app_import: str) -> Flask:
+    """Import ``module:attribute`` and return the Flask application it names."""
+    module_name, _, attribute = app_import.partition(":")
+    return getattr(import_module(module_name), attribute or "app")
+
+
+def worker_app() -> Flask:
+    """The application batch functions run against (see ``run_batches``)."""
+    return _worker_app
+
+
+def _init_worker(app_import: str) -> None:
+    global _worker_app
+    _worker_app = load_app(app_import)
+
+
+def run_batches(
+    app: Flask,
+    app_import: str,
+    function: Callable[[List[Item]], List[Result]],
+    items: Sequence[Item],
+    jobs: Optional[int] = None,
+) -> List[Result]:
+    """Run ``function`` over ``items`` split in batches, across ``jobs`` processes.
+
+    Each process imports ``app_import`` once; ``function`` reaches it
+    through ``worker_app()`` and must be picklable (a module-level function
+    or a ``functools.partial`` of one). With one job, everything runs here
+    against ``app``. Results come back in no particular order.
+    """
+    jobs = max(1, jobs or os.cpu_count() or 1)
+    # a few batches per process keeps them busy when item costs are uneven
+    batch_count = min(len(items), jobs * 4) or 1
+    batches = [list(items[position::batch_count]) for position in range(batch_count)]
+
+    results: List[Result] = []
+    if jobs == 1:
+        global _worker_app
+        _worker_app = app
+        for batch in batches:
+            results.extend(function(batch))
+        return results
+
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(app_import,)) as executor:
+        for batch_results in executor.map(function, batches):
+            results.extend(batch_results)
+    return results
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import csv
+import json
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .shared_cache import SharedCache, content_key
+
+
+DEFAULT_OFFSET_STRIDE = 256
+# namespace of row indexes in a type's shared cache
+SHARED_INDEX_NAMESPACE = "csv_index"
+
+
+def _decoded_lines(handle, position: List[int]) -> Iterator[str]:
+    """Yield decoded lines from a binary handle, tracking the byte offset consumed."""
+    for raw_line in handle:
+        position[0] += len(raw_line)
+        yield raw_line.decode("utf-8")
+
+
+class CsvRowIndex:
+    """Byte offsets of every ``stride``-th data row of a CSV file.
+
+    ``csv.reader`` pulls exactly the lines of one record per ``next()``, so
+    the bytes consumed after a record are the offset of the next one, even
+    when quoted cells span several lines. Reading page N then means seeking
+    to the closest recorded offset and skipping at most ``stride - 1`` rows.
+
+    ``state`` (from ``to_state``) restores an index scanned by another
+    process instead of reading the file again.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        stride: int = DEFAULT_OFFSET_STRIDE,
+        state: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self.path = path
+        self.stride = max(1, int(stride))
+        stat_result = path.stat()
+        self.signature: Tuple[int, int] = (stat_result.st_mtime_ns, stat_result.st_size)
+        self.headers: List[str] = []
+        self.row_count = 0
+        self.offsets: List[int] = []
+        if state is not None:
+            self.headers = state["headers"]
+            self.row_count = state["row_count"]
+            self.offsets = state["offsets"]
+        else:
+            self._scan()
+
+    def to_state(self) -> Dict[str, Any]:
+        return {"headers": self.headers, "row_count": self.row_count, "offsets": self.offsets}
+
+    def _scan(self) -> None:
+        position = [0]
+        with self.path.open("rb") as handle:
+            reader = csv.reader(_decoded_lines(handle, position))
+            self.headers = next(reader, [])
+            if self.headers and self.headers[0].startswith("\ufeff"):
+                self.headers[0] = self.headers[0][1:]
+
+            offset = position[0]
+            for row_number, _ in enumerate(reader):
+                if row_number % self.stride == 0:
+                    self.offsets.append(offset)
+                offset = position[0]
+                self.row_count += 1
+
+    def iter_rows(self, start: int, count: int) -> Iterator[List[str]]:
+        """Yield up to ``count`` data rows starting at row ``start`` (0-based)."""
+        if count <= 0 or start >= self.row_count or start < 0:
+            return
+
+        block = start // self.stride
+        position = [self.offsets[block]]
+        with self.path.open("rb") as handle:
+            handle.seek(position[0])
+            reader = csv.reader(_decoded_lines(handle, position))
+            for _ in range(start - block * self.stride):
+                next(reader, None)
+            for _ in range(count):
+                row = next(reader, None)
+                if row is None:
+                    break
+                yield row
+
+
+class CsvIndexCache:
+    """``CsvRowIndex`` per file, rebuilt when the file's mtime or size changes.
+
+    Indexes are also put in ``shared_cache``, keyed by path, mtime, size and
+    stride (hashing a large CSV would cost as much as scanning it), so other
+    workers restore them instead of scanning.
+    """
+
+    def __init__(self, stride: int = DEFAULT_OFFSET_STRIDE, shared_cache: Optional[SharedCache] = None) -> None:
+        self.stride = stride
+        self.shared_cache = shared_cache
+        self._indexes: Dict[Path, CsvRowIndex] = {}
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, path: Path) -> Optional[CsvRowIndex]:
+        try:
+            stat_result = path.stat()
+        except OSError:
+            self._indexes.pop(path, None)
+            return None
+
+        cached = self._indexes.get(path)
+        if cached and cached.signature == (stat_result.st_mtime_ns, stat_result.st_size):
+            with self._lock:
+                self.hits += 1
+            return cached
+
+        index, _ = self._build(path, (stat_result.st_mtime_ns, stat_result.st_size))
+        with self._lock:
+            self.misses += 1
+            self._indexes[path] = index
+        return index
+
+    def prepare(self, path: Path) -> bool:
+        """Put the index of ``path`` in the shared cache; ``False`` if it was already there."""
+        stat_result = path.stat()
+        _, scanned = self._build(path, (stat_result.st_mtime_ns, stat_result.st_size))
+        return scanned
+
+    def _build(self, path: Path, signature: Tuple[int, int]) -> Tuple[CsvRowIndex, bool]:
+        if self.shared_cache is None:
+            return CsvRowIndex(path, self.stride), True
+
+        key = content_key(str(path.resolve()), *signature, self.stride)
+        stored = self.shared_cache.get(SHARED_INDEX_NAMESPACE, key)
+        if stored is not None:
+            index = CsvRowIndex(path, self.stride, json.loads(stored))
+            # the file changed between the two stats: scan it after all
+            if index.signature == signature:
+                return index, False
+            return CsvRowIndex(path, self.stride), True
+
+        index = CsvRowIndex(path, self.stride)
+        if index.signature == signature:
+            self.shared_cache.put(SHARED_INDEX_NAMESPACE, key, json.dumps(index.to_state()).encode("utf-8"))
+        return index, True
@@ -0,0 +1,239 @@
+from __future__ import annotations
+
+import csv
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Mapping, NamedTuple, Optional, Tuple
+
+
+DATE_FORMATS = (
+    "%Y-%m-%d",
+    "%Y-%m-%dT%H:%M:%S",
+    "%Y-%m-%d %H:%M",
+    "%B %d, %Y",
+    "%B %d, %Y %I:%M %p",
+    "%d/%m/%Y",
+)
+TYPE_SAMPLE_SIZE = 1000
+
+
+def _parse_number(value: str) -> Optional[float]:
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def _parse_date(value: str) -> Optional[datetime]:
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format)
+        except ValueError:
+            continue
+    return None
+
+
+_PARSERS: Dict[str, Callable[[str], Any]] = {
+    "number": _parse_number,
+    "date": _parse_date,
+}
+
+
+def infer_column_type(values: List[str]) -> str:
+    """Return ``number``, ``date`` or ``text`` from a sample of non-empty cells."""
+    sample = [value for value in values[:TYPE_SAMPLE_SIZE] if value]
+    if not sample:
+        return "text"
+    for column_type, parser in _PARSERS.items():
+        if all(parser(value) is not None for value in sample):
+            return column_type
+    return "text"
+
+
+class DatabaseQuery(NamedTuple):
+    sort: Optional[str] = None
+    descending: bool = False
+    equals: Dict[str, str] = {}
+    contains: Dict[str, str] = {}
+    search: str = ""
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.sort or self.equals or self.contains or self.search)
+
+    def as_params(self) -> Dict[str, str]:
+        """Query-string parameters reproducing this query (used to build links)."""
+        params: Dict[str, str] = {}
+        if self.sort:
+            params["sort"] = self.sort
+            params["order"] = "desc" if self.descending else "asc"
+        for column, value in self.equals.items():
+            params[f"where[{column}]"] = value
+        for column, value in self.contains.items():
+            params[f"contains[{column}]"] = value
+        if self.search:
+            params["q"] = self.search
+        return params
+
+
+def parse_database_query(args: Mapping[str, str]) -> DatabaseQuery:
+    """Read ``sort``/``order``/``where[col]``/``contains[col]``/``q`` request arguments."""
+    equals: Dict[str, str] = {}
+    contains: Dict[str, str] = {}
+    for key, value in args.items():
+        if not value or not key.endswith("]"):
+            continue
+        if key.startswith("where["):
+            equals[key[len("where["):-1]] = value
+        elif key.startswith("contains["):
+            contains[key[len("contains["):-1]] = value
+
+    return DatabaseQuery(
+        sort=args.get("sort") or None,
+        descending=args.get("order", "asc").lower() == "desc",
+        equals=equals,
+        contains=contains,
+        search=(args.get("q") or "").strip(),
+    )
+
+
+class CsvTable:
+    """Whole CSV held in memory, column by column, with a type per column.
+
+    Sort keys, lower-cased cells and the per-row search text are derived
+    lazily the first time a query needs them.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        stat_result = path.stat()
+        self.signature: Tuple[int, int] = (stat_result.st_mtime_ns, stat_result.st_size)
+
+        with path.open("r", encoding="utf-8-sig", newline="") as handle:
+            reader = csv.reader(handle)
+            self.headers: List[str] = next(reader, [])
+            self.rows: List[List[str]] = list(reader)
+
+        width = len(self.headers)
+        self.columns: List[List[str]] = [
+            [row[position] if position < len(row) else "" for row in self.rows]
+            for position in range(width)
+        ]
+        self.column_types: List[str] = [infer_column_type(column) for column in self.columns]
+        self._positions = {header: position for position, header in enumerate(self.headers)}
+        self._sort_keys: Dict[int, List[Tuple[int, Any]]] = {}
+        self._folded: Dict[int, List[str]] = {}
+        self._search_text: Optional[List[str]] = None
+        self._lock = threading.Lock()
+
+    @property
+    def row_count(self) -> int:
+        return len(self.rows)
+
+    def _folded_column(self, position: int) -> List[str]:
+        folded = self._folded.get(position)
+        if folded is None:
+            folded = [value.strip().casefold() for value in self.columns[position]]
+            self._folded[position] = folded
+        return folded
+
+    def _sort_key_column(self, position: int) -> List[Tuple[int, Any]]:
+        keys = self._sort_keys.get(position)
+        if keys is None:
+            parser = _PARSERS.get(self.column_types[position])
+            keys = []
+            for value, folded in zip(self.columns[position], self._folded_column(position)):
+                if not value:
+                    keys.append((2, ""))
+                    continue
+                parsed = parser(value) if parser else None
+                keys.append((0, parsed) if parsed is not None else (1, folded))
+            self._sort_keys[position] = keys
+        return keys
+
+    def _row_search_text(self) -> List[str]:
+        if self._search_text is None:
+            self._search_text = ["\x1f".join(row).casefold() for row in self.rows]
+        return self._search_text
+
+    def query(self, database_query: DatabaseQuery) -> List[int]:
+        """Return the indices of matching rows, in display order."""
+        with self._lock:
+            matches = range(self.row_count)
+
+            for column, expected in database_query.equals.items():
+                position = self._positions.get(column)
+                if position is None:
+                    continue
+                folded = self._folded_column(position)
+                target = expected.strip().casefold()
+                parser = _PARSERS.get(self.column_types[position])
+                parsed_target = parser(target) if parser else None
+                if parsed_target is not None:
+                    keys = self._sort_key_column(position)
+                    matches = [index for index in matches if keys[index][1] == parsed_target]
+                else:
+                    matches = [index for index in matches if folded[index] == target]
+
+            for column, fragment in database_query.contains.items():
+                position = self._positions.get(column)
+                if position is None:
+                    continue
+                folded = self._folded_column(position)
+                needle = fragment.strip().casefold()
+                matches = [index for index in matches if needle in folded[index]]
+
+            if database_query.search:
+                search_text = self._row_search_text()
+                terms = database_query.search.casefold().split()
+                matches = [
+                    index for index in matches if all(term in search_text[index] for term in terms)
+                ]
+
+            position = self._positions.get(database_query.sort) if database_query.sort else None
+            if position is not None:
+                keys = self._sort_key_column(position)
+                # empty cells stay last whatever the direction
+                filled = [index for index in matches if keys[index][0] != 2]
+                empty = [index for index in matches if keys[index][0] == 2]
+                filled.sort(key=keys.__getitem__, reverse=database_query.descending)
+                return filled + empty
+            return list(matches)
+
+
+class CsvTableCache:
+    """LRU of ``CsvTable`` objects, rebuilt when the file's mtime or size changes."""
+
+    def __init__(self, max_tables: int = 8) -> None:
+        self.max_tables = max(1, int(max_tables))
+        self._tables: "OrderedDict[Path, CsvTable]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, path: Path) -> Optional[CsvTable]:
+        try:
+            stat_result = path.stat()
+        except OSError:
+            with self._lock:
+                self._tables.pop(path, None)
+            return None
+
+        signature = (stat_result.st_mtime_ns, stat_result.st_size)
+        with self._lock:
+            table = self._tables.get(path)
+            if table is not None and table.signature == signature:
+                self._tables.move_to_end(path)
+                self.hits += 1
+                return table
+            self.misses += 1
+
+        table = CsvTable(path)
+        with self._lock:
+            self._tables[path] = table
+            self._tables.move_to_end(path)
+            while len(self._tables) > self.max_tables:
+                self._tables.popitem(last=False)
+        return table
@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from functools import partial
+from pathlib import Path, PurePosixPath
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from flask import Flask, url_for
+from markupsafe import escape
+
+from .batches import run_batches, worker_app
+from .http_cache import STATIC_EXPORT_ENVIRON_KEY
+
+
+MANIFEST_NAME = ".export-manifest.json"
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+# (url, validator from the previous build or None)
+ExportItem = Tuple[str, Optional[str]]
+# (url, outcome, validator): outcome is "rendered", "unchanged" or an HTTP status
+ExportResult = Tuple[str, str, Optional[str]]
+
+_REDIRECT_PAGE = """<!DOCTYPE html>
+<html lang="fr">
+<head>
+    <meta charset="UTF-8">
+    <meta http-equiv="refresh" content="0; url={location}">
+    <link rel="canonical" href="{location}">
+</head>
+<body><a href="{location}">Redirection…</a></body>
+</html>
+"""
+
+
+class ExportReport(NamedTuple):
+    rendered: List[str]
+    unchanged: List[str]
+    removed: List[str]
+    failed: List[Tuple[str, str]]
+
+
+def collect_export_paths(app: Flask) -> List[str]:
+    """Every URL the build writes: the homepage, each type's pages and the host's assets."""
+    paths = ["/"]
+    with app.test_request_context("/"):
+        for project_type in app.extensions.get("project_types", {}).values():
+            paths.extend(project_type.export_paths())
+
+        static_folder = app.static_folder
+        if static_folder and os.path.isdir(static_folder):
+            for directory, _, filenames in sorted(os.walk(static_folder)):
+                for filename in sorted(filenames):
+                    relative_path = Path(directory, filename).relative_to(static_folder)
+                    paths.append(url_for("static", filename=relative_path.as_posix()))
+
+    return list(dict.fromkeys(paths))
+
+
+def output_path_for(url: str) -> str:
+    """Map a URL path to a file of the build: pages become ``<path>/index.html``.
+
+    ``<path>?page=N`` (a database page) becomes ``<path>/page/N/index.html``,
+    the URL exported database pages link to.
+    """
+    parts = urlsplit(url)
+    path = unquote(parts.path).strip("/")
+    page = parse_qs(parts.query).get("page")
+    if page:
+        path = f"{path}/page/{int(page[0])}"
+    if not path:
+        return "index.html"
+    if "." in PurePosixPath(path).name:
+        return path
+    return f"{path}/index.html"
+
+
+def _write_atomic(target: Path, data: bytes) -> None:
+    target.parent.mkdir(parents=True, exist_ok=True)
+    temporary = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+    temporary.write_bytes(data)
+    os.replace(temporary, target)
+
+
+def _export_batch(output_dir: str, items: List[ExportItem]) -> List[ExportResult]:
+    """Render ``items`` through the worker's app and write the changed ones."""
+    client = worker_app().test_client()
+    results: List[ExportResult] = []
+    for url, previous in items:
+        target = Path(output_dir, output_path_for(url))
+        headers = {}
+        # our pages carry ETags (see http_cache), so unchanged ones come back as 304
+        if previous and previous.startswith('"') and target.is_file():
+            headers["If-None-Match"] = previous
+
+        response = client.get(url, headers=headers, environ_base={STATIC_EXPORT_ENVIRON_KEY: True})
+        try:
+            if response.status_code == 304:
+                results.append((url, "unchanged", previous))
+                continue
+
+            if response.status_code in REDIRECT_STATUSES:
+                location = urlsplit(response.headers.get("Location", "/")).path
+                data = _REDIRECT_PAGE.format(location=escape(location)).encode("utf-8")
+                validator = f"location:{location}"
+            elif response.status_code == 200:
+                data = response.get_data()
+                validator = response.headers.get("ETag") or (
+                    f"sha1:{hashlib.sha1(data).hexdigest()}"
+                )
+            else:
+                results.append((url, str(response.status_code), None))
+                continue
+
+            if validator == previous and target.is_file():
+                results.append((url, "unchanged", validator))
+                continue
+
+            _write_atomic(target, data)
+            results.append((url, "rendered", validator))
+        except Exception as exc:  # pragma: no cover - defensive logging only
+            print(f"Error exporting {url}: {exc}")
+            results.append((url, "error", None))
+        finally:
+            response.close()
+    return results
+
+
+def _read_manifest(manifest_path: Path) -> Dict[str, str]:
+    try:
+        with manifest_path.open("r", encoding="utf-8") as handle:
+            manifest = json.load(handle)
+    except (OSError, ValueError):
+        return {}
+    return manifest if isinstance(manifest, dict) else {}
+
+
+def _remove_output(output_dir: Path, url: str) -> None:
+    target = output_dir / output_path_for(url)
+    try:
+        target.unlink()
+    except OSError:
+        return
+    directory = target.parent
+    while directory != output_dir:
+        try:
+            directory.rmdir()
+        except OSError:
+            break
+        directory = directory.parent
+
+
+def export_site(
+    app: Flask,
+    app_import: str,
+    output_dir: Path,
+    jobs: Optional[int] = None,
+    full: bool = False,
+) -> ExportReport:
+    """Pre-render every exportable page of ``app`` into ``output_dir``.
+
+    Pages are split into batches rendered by ``jobs`` processes, each of
+    which imports ``app_import`` once. A manifest keeps the validator of
+    every page written by the previous build, so an incremental build only
+    rewrites the pages whose ETag (or content hash) changed and deletes the
+    files of pages that no longer exist.
+    """
+    output_dir = Path(output_dir).resolve()
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = output_dir / MANIFEST_NAME
+    previous = {} if full else _read_manifest(manifest_path)
+
+    items: List[ExportItem] = [(url, previous.get(url)) for url in collect_export_paths(app)]
+    results: List[ExportResult] = run_batches(
+        app, app_import, partial(_export_batch, str(output_dir)), items, jobs
+    )
+
+    manifest: Dict[str, str] = {}
+    rendered: List[str] = []
+    unchanged: List[str] = []
+    failed: List[Tuple[str, str]] = []
+    for url, outcome, validator in sorted(results):
+        if outcome == "rendered":
+            rendered.append(url)
+        elif outcome == "unchanged":
+            unchanged.append(url)
+        else:
+            failed.append((url, outcome))
+            continue
+        manifest[url] = validator
+
+    removed = sorted(set(previous) - set(manifest) - {url for url, _ in failed})
+    # a file can be reached by two URLs (``/x/`` and ``/x/index.html``)
+    live_outputs = {output_path_for(url) for url in manifest}
+    for url in removed:
+        if output_path_for(url) not in live_outputs:
+            _remove_output(output_dir, url)
+
+    _write_atomic(
+        manifest_path, json.dumps(manifest, indent=2, sort_keys=True).encode("utf-8")
+    )
+    return ExportReport(rendered, unchanged, removed, failed)
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, Optional, Tuple
+from urllib.parse import quote
+
+from flask import Response, request
+from werkzeug.datastructures import ContentRange
+from werkzeug.http import is_resource_modified
+
+
+DELIVERY_MODES = ("wsgi", "x-accel-redirect", "x-sendfile")
+DEFAULT_BLOCK_SIZE = 64 * 1024
+
+
+def _iter_slice(handle: BinaryIO, length: int, block_size: int) -> Iterator[bytes]:
+    try:
+        remaining = length
+        while remaining > 0:
+            chunk = handle.read(min(block_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        handle.close()
+
+
+class FileDelivery:
+    """Sends files with validators and byte ranges, in-process or through the proxy.
+
+    ``wsgi`` mode opens the file at the requested offset and, when the slice
+    runs to the end of the file, hands it to the server's ``wsgi.file_wrapper``
+    so servers such as gunicorn or ``flask serve`` push it with ``sendfile`` instead of copying
+    it through Python (under ASGI, ``AsgiBridge`` sends it from the event
+    loop). Other slices are streamed in bounded blocks.
+
+    ``x-accel-redirect`` (nginx) and ``x-sendfile`` (Apache, lighttpd) only
+    answer with a header naming the file; the proxy then does the transfer,
+    ranges included, and the worker is free immediately. ``internal_prefixes``
+    maps local directories to the internal locations the proxy serves them at.
+    """
+
+    def __init__(
+        self,
+        mode: str = "wsgi",
+        internal_prefixes: Optional[Dict[Path, str]] = None,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+    ) -> None:
+        if mode not in DELIVERY_MODES:
+            raise ValueError(f"Unknown delivery mode '{mode}', expected one of {DELIVERY_MODES}")
+        self.mode = mode
+        self.internal_prefixes = {
+            os.path.join(os.path.abspath(directory), ""): prefix.rstrip("/") + "/"
+            for directory, prefix in (internal_prefixes or {}).items()
+        }
+        self.block_size = int(block_size)
+
+    def _internal_uri(self, path: Path) -> Optional[str]:
+        absolute = os.path.abspath(path)
+        for directory, prefix in self.internal_prefixes.items():
+            if absolute.startswith(directory):
+                # headers are latin-1 and the proxy decodes the URI: spaces, '?',
+                # '%' or non-ASCII names would otherwise break or 500
+                return prefix + quote(Path(absolute[len(directory):]).as_posix(), safe="/")
+        return None
+
+    def send(
+        self,
+        path: Path,
+        size: int,
+        mimetype: str,
+        etag: str,
+        mtime_ns: int,
+        offload: bool = True,
+    ) -> Response:
+        """Answer the current request with ``path`` (``size`` bytes as last stat'ed)."""
+        environ = request.environ
+        last_modified = datetime.fromtimestamp(mtime_ns // 1_000_000_000, tz=timezone.utc)
+
+        response = Response(mimetype=mimetype, direct_passthrough=True)
+        response.set_etag(etag)
+        response.last_modified = last_modified
+        response.accept_ranges = "bytes"
+
+        if not is_resource_modified(environ, etag=etag, last_modified=last_modified):
+            response.status_code = 304
+            return response
+
+        if offload and self.mode == "x-sendfile":
+            response.headers["X-Sendfile"] = quote(os.path.abspath(path), safe="/")
+            return response
+        if offload and self.mode == "x-accel-redirect":
+            internal_uri = self._internal_uri(path)
+            if internal_uri is not None:
+                response.headers["X-Accel-Redirect"] = internal_uri
+                return response
+
+        byte_range = self._requested_range(size, etag, last_modified)
+        if byte_range == "unsatisfiable":
+            response.status_code = 416
+            response.content_range = ContentRange("bytes", None, None, size)
+            return response
+
+        start, stop = byte_range or (0, size)
+        if byte_range:
+            response.status_code = 206
+            response.content_range = ContentRange("bytes", start, stop, size)
+        response.content_length = stop - start
+        if request.method == "HEAD":
+            return response
+
+        handle = open(path, "rb")
+        handle.seek(start)
+        file_wrapper = environ.get("wsgi.file_wrapper")
+        if file_wrapper is not None and stop == size:
+            # runs to EOF from the current offset, which servers can sendfile()
+            response.response = file_wrapper(handle, self.block_size)
+        else:
+            response.response = _iter_slice(handle, stop - start, self.block_size)
+        return response
+
+    @staticmethod
+    def _requested_range(size: int, etag: str, last_modified: datetime):
+        """``(start, stop)`` of a single satisfiable range, ``None`` for the whole file."""
+        byte_range = request.range
+        if byte_range is None or byte_range.units != "bytes":
+            return None
+        # If-Range: a stale client copy gets the whole file, not a slice of a new one
+        if "HTTP_IF_RANGE" in request.environ and is_resource_modified(
+            request.environ, etag=etag, last_modified=last_modified, ignore_if_range=False
+        ):
+            return None
+        if len(byte_range.ranges) != 1:
+            return None  # multipart/byteranges is not worth it, the full body is valid
+        bounds: Optional[Tuple[int, int]] = byte_range.range_for_length(size)
+        if bounds is None:
+            return "unsatisfiable"
+        return bounds
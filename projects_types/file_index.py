@@ -0,0 +1,298 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+
+FileEntryFactory = Callable[[str, str], Dict[str, Any]]
+
+
+class DirectoryEntry(NamedTuple):
+    mtime_ns: int
+    files: List[str]
+    folders: List[str]
+
+
+def _join(directory: str, name: str) -> str:
+    return f"{directory}/{name}" if directory else name
+
+
+def is_hidden_path(relative_path: str, hidden_files: Set[str], hidden_folders: Set[str]) -> bool:
+    """Apply the ``hidden_files``/``hidden_folders`` project settings to a file path."""
+    if relative_path in hidden_files:
+        return True
+    parts = relative_path.split("/")[:-1]
+    for depth, folder in enumerate(parts):
+        if folder in hidden_folders or "/".join(parts[: depth + 1]) in hidden_folders:
+            return True
+    return False
+
+
+class _Snapshot(NamedTuple):
+    directories: Dict[str, DirectoryEntry]
+    files: frozenset
+    sorted_files: Tuple[str, ...]
+    routes: Dict[str, str]
+    digest: str
+
+
+class ProjectFileIndex:
+    """In-memory listing of the document files of one project.
+
+    Every directory is scanned once and remembered with its mtime. A refresh
+    only stats the known directories and rescans those whose mtime changed
+    (an entry was added, removed or renamed), so the cost of keeping the
+    index current is one stat per directory instead of a full walk.
+
+    Alongside the listing, a routing map sends every URL a page can be
+    reached by (exact path, path without suffix, folder) to its file. Each
+    refresh builds a new snapshot and swaps it in with a single assignment,
+    so readers never see a half-updated index.
+    """
+
+    def __init__(self, root: Path, suffixes: Iterable[str], file_entry: FileEntryFactory) -> None:
+        self.root = root
+        self.suffixes = tuple(suffix.lower() for suffix in suffixes)
+        self.file_entry = file_entry
+        self.version = 0
+        self._trees: Dict[Tuple[frozenset, frozenset], Dict[str, Any]] = {}
+
+        directories: Dict[str, DirectoryEntry] = {}
+        self._scan_tree(directories, "")
+        self._snapshot = self._make_snapshot(directories)
+
+    def _scan_directory(self, relative_dir: str) -> DirectoryEntry:
+        path = self.root / relative_dir if relative_dir else self.root
+        files: List[str] = []
+        folders: List[str] = []
+        try:
+            mtime_ns = path.stat().st_mtime_ns
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    if entry.is_file():
+                        if os.path.splitext(entry.name)[1].lower() in self.suffixes:
+                            files.append(entry.name)
+                    elif entry.is_dir():
+                        folders.append(entry.name)
+        except (PermissionError, FileNotFoundError, NotADirectoryError):
+            return DirectoryEntry(-1, [], [])
+
+        files.sort(key=str.lower)
+        folders.sort(key=str.lower)
+        return DirectoryEntry(mtime_ns, files, folders)
+
+    def _scan_tree(self, directories: Dict[str, DirectoryEntry], relative_dir: str) -> None:
+        entry = self._scan_directory(relative_dir)
+        directories[relative_dir] = entry
+        for folder in entry.folders:
+            self._scan_tree(directories, _join(relative_dir, folder))
+
+    def _forget_tree(self, directories: Dict[str, DirectoryEntry], relative_dir: str) -> None:
+        entry = directories.pop(relative_dir, None)
+        if entry is None:
+            return
+        for folder in entry.folders:
+            self._forget_tree(directories, _join(relative_dir, folder))
+
+    def _make_snapshot(self, directories: Dict[str, DirectoryEntry]) -> _Snapshot:
+        files = frozenset(
+            _join(relative_dir, name)
+            for relative_dir, entry in directories.items()
+            for name in entry.files
+        )
+
+        # Precedence mirrors the historical lookup order: an exact file path,
+        # then a file of the parent folder matching the last segment without
+        # its suffix, then the default document of a folder.
+        routes: Dict[str, str] = {path: path for path in files}
+        for relative_dir, entry in directories.items():
+            for name in entry.files:
+                stem = os.path.splitext(name)[0]
+                if os.path.splitext(stem)[1].lower() not in self.suffixes:
+                    routes.setdefault(_join(relative_dir, stem), _join(relative_dir, name))
+        for relative_dir, entry in directories.items():
+            default = self._default_file(relative_dir, entry)
+            if default:
+                routes.setdefault(relative_dir, default)
+
+        # content-derived, so every worker process agrees on it (used in ETags)
+        digest = hashlib.sha1()
+        for relative_dir in sorted(directories):
+            entry = directories[relative_dir]
+            digest.update(repr((relative_dir, entry.files, entry.folders)).encode("utf-8"))
+
+        return _Snapshot(directories, files, tuple(sorted(files)), routes, digest.hexdigest())
+
+    def refresh(self) -> bool:
+        """Rescan directories whose mtime changed. Returns True if anything changed."""
+        directories = dict(self._snapshot.directories)
+        changed = False
+        for relative_dir, entry in list(directories.items()):
+            if relative_dir not in directories:
+                continue  # dropped while handling a parent
+            path = self.root / relative_dir if relative_dir else self.root
+            try:
+                mtime_ns = path.stat().st_mtime_ns
+            except OSError:
+                mtime_ns = -1
+            if mtime_ns == entry.mtime_ns:
+                continue
+
+            changed = True
+            fresh = self._scan_directory(relative_dir)
+            directories[relative_dir] = fresh
+            for folder in set(entry.folders) - set(fresh.folders):
+                self._forget_tree(directories, _join(relative_dir, folder))
+            for folder in set(fresh.folders) - set(entry.folders):
+                self._scan_tree(directories, _join(relative_dir, folder))
+
+        if changed:
+            self._snapshot = self._make_snapshot(directories)
+            self._trees = {}
+            self.version += 1
+        return changed
+
+    @property
+    def digest(self) -> str:
+        """Hash of the indexed structure; changes whenever a file or folder appears or goes."""
+        return self._snapshot.digest
+
+    def resolve(self, page: str) -> Optional[str]:
+        """Map a normalised page path (``""`` for the project root) to a file."""
+        return self._snapshot.routes.get(page)
+
+    def directory(self, relative_dir: str) -> Optional[DirectoryEntry]:
+        return self._snapshot.directories.get(relative_dir)
+
+    def files(self) -> Tuple[str, ...]:
+        """Every indexed file, sorted (computed once per snapshot)."""
+        return self._snapshot.sorted_files
+
+    def default_file(self, relative_dir: str) -> Optional[str]:
+        """Pick the page shown for a folder: readme.md, then index.md, then the first file."""
+        entry = self._snapshot.directories.get(relative_dir)
+        if entry is None:
+            return None
+        return self._default_file(relative_dir, entry)
+
+    @staticmethod
+    def _default_file(relative_dir: str, entry: DirectoryEntry) -> Optional[str]:
+        if not entry.files:
+            return None
+        for preferred in ("readme.md", "index.md"):
+            for name in entry.files:
+                if name.lower() == preferred:
+                    return _join(relative_dir, name)
+        return _join(relative_dir, entry.files[0])
+
+    def build_tree(self, hidden_files: Set[str], hidden_folders: Set[str]) -> Dict[str, Any]:
+        """Return the sidebar tree, memoised until the index changes."""
+        key = (frozenset(hidden_files), frozenset(hidden_folders))
+        trees = self._trees
+        tree = trees.get(key)
+        if tree is None:
+            tree = self._build_tree(self._snapshot.directories, "", hidden_files, hidden_folders)
+            trees[key] = tree
+        return tree
+
+    def _build_tree(
+        self,
+        directories: Dict[str, DirectoryEntry],
+        relative_dir: str,
+        hidden_files: Set[str],
+        hidden_folders: Set[str],
+    ) -> Dict[str, Any]:
+        tree: Dict[str, Any] = {"files": [], "folders": {}}
+        entry = directories.get(relative_dir)
+        if entry is None:
+            return tree
+
+        for name in entry.files:
+            relative_path = _join(relative_dir, name)
+            if relative_path not in hidden_files:
+                tree["files"].append(self.file_entry(name, relative_path))
+        for folder in entry.folders:
+            folder_path = _join(relative_dir, folder)
+            if folder not in hidden_folders and folder_path not in hidden_folders:
+                tree["folders"][folder] = self._build_tree(
+                    directories, folder_path, hidden_files, hidden_folders
+                )
+        return tree
+
+
+class FileIndexRegistry:
+    """Per-project ``ProjectFileIndex`` instances for one project type.
+
+    Indexes are built on first use and refreshed at most once every
+    ``refresh_interval`` seconds (0 checks on every access). Each project
+    has its own lock: building one large tree does not hold up the others,
+    and while a project's index is being refreshed, other requests keep
+    using its current snapshot.
+    """
+
+    def __init__(
+        self,
+        projects_dir: Path,
+        suffixes: Iterable[str],
+        file_entry: FileEntryFactory,
+        refresh_interval: float = 2.0,
+    ) -> None:
+        self.projects_dir = projects_dir
+        self.suffixes = tuple(suffixes)
+        self.file_entry = file_entry
+        self.refresh_interval = float(refresh_interval)
+        self._indexes: Dict[str, Tuple[float, ProjectFileIndex]] = {}
+        self._project_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def _project_lock(self, project_name: str) -> threading.Lock:
+        with self._lock:
+            lock = self._project_locks.get(project_name)
+            if lock is None:
+                lock = self._project_locks[project_name] = threading.Lock()
+            return lock
+
+    def get(self, project_name: str) -> Optional[ProjectFileIndex]:
+        cached = self._indexes.get(project_name)
+        if cached and time.monotonic() - cached[0] < self.refresh_interval:
+            return cached[1]
+
+        lock = self._project_lock(project_name)
+        if cached and not lock.acquire(blocking=False):
+            # another thread is refreshing this index: its snapshot is still valid
+            return cached[1]
+        if not cached:
+            lock.acquire()
+        try:
+            now = time.monotonic()
+            cached = self._indexes.get(project_name)
+            if cached and now - cached[0] < self.refresh_interval:
+                return cached[1]
+
+            project_directory = self.projects_dir / project_name
+            if not project_directory.is_dir():
+                with self._lock:
+                    self._indexes.pop(project_name, None)
+                return None
+
+            if cached:
+                index = cached[1]
+                index.refresh()
+            else:
+                index = ProjectFileIndex(project_directory, self.suffixes, self.file_entry)
+            with self._lock:
+                self._indexes[project_name] = (now, index)
+            return index
+        finally:
+            lock.release()
+
+    def invalidate(self, project_name: Optional[str] = None) -> None:
+        with self._lock:
+            if project_name is None:
+                self._indexes.clear()
+            else:
+                self._indexes.pop(project_name, None)
@@ -1,16 +1,87 @@
 from __future__ import annotations
 
-import importlib.util
-from typing import Any, Dict, List
+import atexit
+import hashlib
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 
-from flask import abort, render_template
-from werkzeug.exceptions import NotFound
+from flask import abort
 
 from .base import ProjectType
+from .metrics import server_timing_header
+
+if TYPE_CHECKING:
+    from .flask_workers import FlaskWorkerPool
+
+# flask_workers (subprocess, multiprocessing) is imported on first use so that
+# starting the host does not pay for it.
+
+
+class FlaskProjectDispatcher:
+    """WSGI middleware that mounts every Flask project under ``<mount_path>/<project_name>``.
+
+    Matching requests are handed straight to the project application with
+    ``SCRIPT_NAME``/``PATH_INFO`` shifted, so the host application (and its
+    request context) is bypassed entirely. Anything else falls through to the
+    wrapped host application. The project type is looked up by identifier on
+    every request so a configuration reload takes effect immediately.
+
+    Since the host's request hooks never run for these requests, the
+    ``load`` (finding or importing the application) and ``dispatch`` (until
+    it starts the response) phases are timed here.
+    """
+
+    def __init__(self, host_wsgi_app, app, identifier: str, mount_path: str = "/flask") -> None:
+        self.host_wsgi_app = host_wsgi_app
+        self.app = app
+        self.identifier = identifier
+        self.mount_path = mount_path.rstrip("/")
+
+    def __call__(self, environ, start_response):
+        path_info = environ.get("PATH_INFO", "")
+        prefix = f"{self.mount_path}/"
+        project_type = self.app.extensions["project_types"].get(self.identifier)
+        if not path_info.startswith(prefix) or project_type is None:
+            return self.host_wsgi_app(environ, start_response)
+
+        project_name, _, subpath = path_info[len(prefix):].partition("/")
+        started = time.perf_counter()
+        project_wsgi_app = None
+        if project_name and project_type._project_exists(project_name):
+            project_wsgi_app = project_type.get_wsgi_app(project_name)
+        if project_wsgi_app is None:
+            # unknown or broken project: let the host render its error pages
+            return self.host_wsgi_app(environ, start_response)
+
+        environ["SCRIPT_NAME"] = f"{environ.get('SCRIPT_NAME', '')}{prefix}{project_name}"
+        environ["PATH_INFO"] = f"/{subpath}"
+        registry = self.app.extensions.get("metrics")
+        if registry is None:
+            return project_wsgi_app(environ, start_response)
+
+        loaded = time.perf_counter()
+
+        def timed_start_response(status, headers, exc_info=None):
+            finished = time.perf_counter()
+            phases = {"load": loaded - started, "dispatch": finished - loaded}
+            if exc_info is None:
+                for phase, seconds in phases.items():
+                    registry.observe_phase(self.identifier, project_name, phase, seconds)
+                registry.observe_request(self.identifier, project_name, finished - started)
+            if self.app.config.get("METRICS_SERVER_TIMING", True):
+                headers = list(headers)
+                headers.append(("Server-Timing", server_timing_header(phases, finished - started)))
+            return start_response(status, headers, exc_info)
+
+        return project_wsgi_app(environ, timed_start_response)
 
 
 class FlaskProjectType(ProjectType):
     type_name = "flask"
+    # requests below it are served by the project applications (see FlaskProjectDispatcher)
+    mount_path = "/flask"
 
     def __init__(self, app, raw_config: Dict[str, Any]) -> None:
         super().__init__(app, raw_config)
@@ -19,86 +90,214 @@ class FlaskProjectType(ProjectType):
         self.module_prefix = raw_config.get(
             "module_prefix", f"{self.identifier}_projects"
         )
+        self.cache_apps = raw_config.get("cache_apps", True)
+        self.preload_apps = raw_config.get("preload_apps", False)
 
-    def list_projects(self) -> List[Dict[str, Any]]:
+        # project name -> (stat signature, content hash, loaded application)
+        self._loaded_apps: Dict[str, Tuple[Tuple[int, int], str, Any]] = {}
+        self._loaded_apps_lock = threading.Lock()
+        # project name -> (stat signature, worker pool) for process-isolated projects
+        self._worker_pools: Dict[str, Tuple[Tuple[int, int], FlaskWorkerPool]] = {}
+        # unregistered in close(), so reloaded instances are not kept alive
+        atexit.register(self.shutdown_worker_pools)
+
+    def scan_projects(self) -> List[Dict[str, Any]]:
         if not self.projects_root_exists():
             return []
 
         projects: List[Dict[str, Any]] = []
         for directory in sorted(self.projects_dir.iterdir()):
             if directory.is_dir() and (directory / self.app_filename).exists():
-                project_id = directory.name
-                projects.append(
-                    {
-                        "id": project_id,
-                        "name": self.get_project_display_name(project_id),
-                        "emoji": self.get_project_emoji(project_id),
-                    }
-                )
+                projects.append(self.describe_project(directory.name))
         return projects
 
     def register_routes(self) -> None:
         app = self.app
 
-        app.add_url_rule(
-            "/flask",
+        self.add_url_rule(
+            self.mount_path,
             endpoint="flask_list",
             view_func=self._flask_list_view,
         )
 
-        app.add_url_rule(
-            "/flask/<project_name>",
+        self.add_url_rule(
+            f"{self.mount_path}/<project_name>",
             defaults={"subpath": ""},
             endpoint="flask_project",
             view_func=self._flask_project_view,
             strict_slashes=False,
         )
 
-        app.add_url_rule(
-            "/flask/<project_name>/<path:subpath>",
+        self.add_url_rule(
+            f"{self.mount_path}/<project_name>/<path:subpath>",
             view_func=self._flask_project_view,
         )
 
+        # installed once per identifier, later instances are found through it
+        dispatchers = app.extensions.setdefault("flask_project_dispatchers", set())
+        if self.identifier not in dispatchers:
+            app.wsgi_app = FlaskProjectDispatcher(app.wsgi_app, app, self.identifier, self.mount_path)
+            dispatchers.add(self.identifier)
+
+        if self.preload_apps:
+            self.preload_projects()
+
+    def preload_projects(self) -> None:
+        """Import every project application up front instead of on first request."""
+        from .flask_workers import FlaskWorkerPool
+
+        for project in self.list_projects():
+            project_wsgi_app = self.get_wsgi_app(project["id"])
+            if isinstance(project_wsgi_app, FlaskWorkerPool):
+                project_wsgi_app.start()
+
+    def preload(self) -> None:
+        """Import the inline project applications; process pools start in each worker."""
+        from .flask_workers import pool_settings
+
+        for project in self.list_projects():
+            project_name = project["id"]
+            if pool_settings(self.raw_config, self.load_project_config(project_name)) is None:
+                self.get_flask_app(project_name)
+
+    def after_fork(self) -> None:
+        # pools (and their pipes) belong to the master, which stops them
+        with self._loaded_apps_lock:
+            self._worker_pools = {}
+
     def _flask_list_view(self):
-        projects = self.list_projects()
-        return render_template("flask_list.html", projects=projects)
+        return self.render_project_list("flask_list.html")
 
     def _flask_project_view(self, project_name: str, subpath: str = ""):
+        # Project requests are served by FlaskProjectDispatcher before reaching
+        # the host app; these rules only exist for url_for() and error pages.
         if not self._project_exists(project_name):
             abort(404)
-
-        project_app = self._load_flask_app(project_name)
-        if project_app is None:
-            abort(500)
-
-        request_path = f"/{subpath}" if subpath else "/"
-        with project_app.test_request_context(request_path):
-            try:
-                return project_app.full_dispatch_request()
-            except NotFound:
-                abort(404)
+        abort(500)
 
     def _project_exists(self, project_name: str) -> bool:
         project_directory = self.projects_dir / project_name
         return project_directory.is_dir() and (project_directory / self.app_filename).exists()
 
-    def _load_flask_app(self, project_name: str):
+    def get_wsgi_app(self, project_name: str):
+        """Return the WSGI callable that serves requests for a project.
+
+        Projects configured with ``isolation: process`` get a worker pool,
+        every other project runs inline in the host interpreter.
+        """
+        from .flask_workers import pool_settings
+
+        settings = pool_settings(self.raw_config, self.load_project_config(project_name))
+        if settings is None:
+            return self.get_flask_app(project_name)
+        return self._get_worker_pool(project_name, settings)
+
+    def _get_worker_pool(self, project_name: str, settings: Dict[str, Any]) -> Optional[FlaskWorkerPool]:
+        from .flask_workers import FlaskWorkerPool
+
         module_path = self.projects_dir / project_name / self.app_filename
-        if not module_path.exists():
+        try:
+            stat_result = module_path.stat()
+        except OSError:
             return None
+        signature = (stat_result.st_mtime_ns, stat_result.st_size)
 
-        spec = importlib.util.spec_from_file_location(
-            f"{self.module_prefix}.{project_name}", module_path
-        )
-        if not spec or not spec.loader:
+        with self._loaded_apps_lock:
+            cached = self._worker_pools.get(project_name)
+            if cached and cached[0] == signature:
+                pool = cached[1]
+                if pool.size == int(settings["workers"]) and pool.request_timeout == float(
+                    settings["request_timeout"]
+                ):
+                    return pool
+
+            pool = FlaskWorkerPool(
+                module_path,
+                f"{self.module_prefix}.{project_name}",
+                self.application_attribute,
+                size=settings["workers"],
+                request_timeout=settings["request_timeout"],
+            )
+            self._worker_pools[project_name] = (signature, pool)
+
+        if cached:
+            cached[1].shutdown()
+        return pool
+
+    def close(self) -> None:
+        super().close()
+        atexit.unregister(self.shutdown_worker_pools)
+        self.shutdown_worker_pools()
+
+    def shutdown_worker_pools(self) -> None:
+        """Stop every worker process started for process-isolated projects."""
+        with self._loaded_apps_lock:
+            pools, self._worker_pools = self._worker_pools, {}
+        for _, pool in pools.values():
+            pool.shutdown()
+
+    def get_flask_app(self, project_name: str):
+        """Return the project's application, re-importing it only when app.py changed."""
+        module_path = self.projects_dir / project_name / self.app_filename
+        if not self.cache_apps:
+            return self._load_flask_app(project_name, module_path)
+
+        try:
+            stat_result = module_path.stat()
+        except OSError:
+            with self._loaded_apps_lock:
+                self._loaded_apps.pop(project_name, None)
+            return None
+        signature = (stat_result.st_mtime_ns, stat_result.st_size)
+
+        cached = self._loaded_apps.get(project_name)
+        if cached and cached[0] == signature:
+            return cached[2]
+
+        with self._loaded_apps_lock:
+            cached = self._loaded_apps.get(project_name)
+            if cached and cached[0] == signature:
+                return cached[2]
+
+            content_hash = self._hash_file(module_path)
+            if cached and content_hash is not None and cached[1] == content_hash:
+                # touched but unchanged: keep the loaded application
+                self._loaded_apps[project_name] = (signature, content_hash, cached[2])
+                return cached[2]
+
+            flask_app = self._load_flask_app(project_name, module_path)
+            if flask_app is None or content_hash is None:
+                self._loaded_apps.pop(project_name, None)
+                return flask_app
+
+            self._loaded_apps[project_name] = (signature, content_hash, flask_app)
+            return flask_app
+
+    def invalidate_project(self, project_name: Optional[str] = None) -> None:
+        """Drop one cached application, or all of them when no name is given."""
+        with self._loaded_apps_lock:
+            if project_name is None:
+                self._loaded_apps.clear()
+            else:
+                self._loaded_apps.pop(project_name, None)
+
+    @staticmethod
+    def _hash_file(path: Path) -> Optional[str]:
+        try:
+            return hashlib.sha1(path.read_bytes()).hexdigest()
+        except OSError:
+            return None
+
+    def _load_flask_app(self, project_name: str, module_path: Path):
+        if not module_path.exists():
             return None
 
-        module = importlib.util.module_from_spec(spec)
+        from .flask_workers import load_application
+
         try:
-            spec.loader.exec_module(module)
+            return load_application(
+                module_path, f"{self.module_prefix}.{project_name}", self.application_attribute
+            )
         except Exception as exc:  # pragma: no cover - defensive logging only
             print(f"Error loading Flask project {project_name}: {exc}")
             return None
-
-        flask_app = getattr(module, self.application_attribute, None)
-        return flask_app
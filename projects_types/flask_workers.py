@@ -0,0 +1,256 @@
+from __future__ import annotations
+
+import importlib.util
+import io
+import os
+import queue
+import socket
+import subprocess
+import sys
+import threading
+from multiprocessing.connection import Connection
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from werkzeug.test import run_wsgi_app
+from werkzeug.wsgi import get_input_stream
+
+
+# Only plain values survive the trip to a worker process; wsgi.input and
+# friends are rebuilt on the other side.
+_FORWARDED_ENVIRON_TYPES = (str, int, float, bool)
+# answer of a pool that was shut down (app.py changed) to requests still holding it
+_POOL_CLOSED_RESPONSE = ("503 SERVICE UNAVAILABLE", [("Retry-After", "1")], b"The project was reloaded, retry")
+
+
+def load_application(module_path: Path, module_name: str, attribute: str):
+    """Import ``module_path`` under ``module_name`` and return its ``attribute``."""
+    spec = importlib.util.spec_from_file_location(module_name, module_path)
+    if not spec or not spec.loader:
+        return None
+
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return getattr(module, attribute, None)
+
+
+def run_worker(argv: List[str]) -> None:
+    """Command-line entry point used by ``_Worker`` to start a worker process."""
+    descriptor, module_path, module_name, attribute = argv[:4]
+    _worker_main(Connection(int(descriptor)), module_path, module_name, attribute)
+
+
+def _worker_main(connection, module_path: str, module_name: str, attribute: str) -> None:
+    """Entry point of a worker process: serve forwarded requests until told to stop."""
+    application = None
+    load_error = ""
+    try:
+        application = load_application(Path(module_path), module_name, attribute)
+    except Exception as exc:  # pragma: no cover - reported back to the host
+        load_error = str(exc)
+    if application is None and not load_error:
+        load_error = f"no '{attribute}' attribute in {module_path}"
+
+    while True:
+        try:
+            message = connection.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+        if message is None:
+            break
+
+        environ, body = message
+        if application is None:
+            connection.send(("500 INTERNAL SERVER ERROR", [], load_error.encode("utf-8")))
+            continue
+
+        environ.update(
+            {
+                "wsgi.input": io.BytesIO(body),
+                "wsgi.errors": sys.stderr,
+                "wsgi.version": (1, 0),
+                "wsgi.multithread": False,
+                "wsgi.multiprocess": True,
+                "wsgi.run_once": False,
+            }
+        )
+        try:
+            app_iter, status, headers = run_wsgi_app(application, environ, buffered=True)
+            try:
+                payload = b"".join(app_iter)
+            finally:
+                if hasattr(app_iter, "close"):
+                    app_iter.close()
+            connection.send((status, headers.to_wsgi_list(), payload))
+        except Exception as exc:  # pragma: no cover - defensive logging only
+            print(f"Error in Flask worker {module_name}: {exc}")
+            connection.send(("500 INTERNAL SERVER ERROR", [], b""))
+
+
+class _Worker:
+    """One worker process, started through ``run_worker`` in a fresh interpreter.
+
+    A fresh interpreter is used (rather than forking the host) so workers do
+    not inherit the host's threads, and the pipe is a socket pair handed over
+    by file descriptor.
+    """
+
+    def __init__(self, module_path: Path, module_name: str, attribute: str) -> None:
+        parent_socket, child_socket = socket.socketpair()
+        package_root = str(Path(__file__).resolve().parent.parent)
+        environment = dict(os.environ)
+        environment["PYTHONPATH"] = os.pathsep.join(
+            filter(None, [package_root, environment.get("PYTHONPATH")])
+        )
+        try:
+            self.process = subprocess.Popen(
+                [
+                    sys.executable,
+                    "-c",
+                    f"import sys; from {__name__} import run_worker; run_worker(sys.argv[1:])",
+                    str(child_socket.fileno()),
+                    str(module_path),
+                    module_name,
+                    attribute,
+                ],
+                pass_fds=(child_socket.fileno(),),
+                env=environment,
+            )
+        finally:
+            child_socket.close()
+        self.connection = Connection(parent_socket.detach())
+
+    def stop(self, force: bool = False) -> None:
+        if not force:
+            try:
+                self.connection.send(None)
+            except (BrokenPipeError, OSError):
+                force = True
+        if force and self.process.poll() is None:
+            self.process.kill()
+        try:
+            self.process.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+        self.connection.close()
+
+
+class FlaskWorkerPool:
+    """WSGI callable that forwards requests to a pool of processes running one project.
+
+    Each request is read fully, shipped to an idle worker over a pipe and the
+    buffered response is replayed to the client. Workers that exceed
+    ``request_timeout`` or die are killed and replaced.
+    """
+
+    def __init__(
+        self,
+        module_path: Path,
+        module_name: str,
+        attribute: str,
+        size: int = 2,
+        request_timeout: float = 30.0,
+    ) -> None:
+        self.module_path = module_path
+        self.module_name = module_name
+        self.attribute = attribute
+        self.size = max(1, int(size))
+        self.request_timeout = float(request_timeout)
+
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._workers: List[_Worker] = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def start(self) -> bool:
+        """Spawn the missing workers; ``False`` once the pool has been shut down."""
+        with self._lock:
+            if self._closed:
+                return False
+            while len(self._workers) < self.size:
+                worker = self._spawn()
+                self._workers.append(worker)
+                self._idle.put(worker)
+        return True
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._closed = True
+            workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.stop()
+
+    def _spawn(self) -> _Worker:
+        return _Worker(self.module_path, self.module_name, self.attribute)
+
+    def _replace(self, worker: _Worker) -> None:
+        worker.stop(force=True)
+        with self._lock:
+            if worker in self._workers:
+                self._workers.remove(worker)
+            if self._closed:
+                return
+            replacement = self._spawn()
+            self._workers.append(replacement)
+        self._idle.put(replacement)
+
+    def _forward(self, environ: Dict[str, Any], body: bytes) -> Tuple[str, List[Tuple[str, str]], bytes]:
+        try:
+            worker = self._idle.get(timeout=self.request_timeout)
+        except queue.Empty:
+            return "503 SERVICE UNAVAILABLE", [("Retry-After", "1")], b"All workers are busy"
+        if self._closed:
+            # shut down while this request waited: the worker is already stopped
+            return _POOL_CLOSED_RESPONSE
+
+        try:
+            worker.connection.send((environ, body))
+            if not worker.connection.poll(self.request_timeout):
+                print(f"Flask worker for {self.module_name} timed out, restarting it")
+                self._replace(worker)
+                return "504 GATEWAY TIMEOUT", [], b"The project took too long to respond"
+            response = worker.connection.recv()
+        except (EOFError, BrokenPipeError, OSError):
+            print(f"Flask worker for {self.module_name} crashed, restarting it")
+            self._replace(worker)
+            return "502 BAD GATEWAY", [], b"The project worker crashed"
+
+        self._idle.put(worker)
+        return response
+
+    def __call__(self, environ, start_response):
+        # a replaced pool must not spawn workers nobody would ever stop
+        if not self._workers and not self.start():
+            status, headers, payload = _POOL_CLOSED_RESPONSE
+        else:
+            body = get_input_stream(environ).read()
+            forwarded = {
+                key: value
+                for key, value in environ.items()
+                if isinstance(value, _FORWARDED_ENVIRON_TYPES) and not key.startswith("werkzeug.")
+            }
+            status, headers, payload = self._forward(forwarded, body)
+        if not any(name.lower() == "content-length" for name, _ in headers):
+            headers = headers + [("Content-Length", str(len(payload)))]
+        start_response(status, headers)
+        return [payload]
+
+
+def pool_settings(type_config: Dict[str, Any], project_config: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Merge type-level and project-level isolation settings.
+
+    Returns ``None`` when the project runs inline in the host interpreter.
+    """
+    settings = {
+        "isolation": type_config.get("isolation", "inline"),
+        "workers": type_config.get("workers", 2),
+        "request_timeout": type_config.get("request_timeout", 30),
+    }
+    overrides = project_config.get("flask") or {}
+    for key in settings:
+        if key in overrides:
+            settings[key] = overrides[key]
+
+    if settings["isolation"] != "process":
+        return None
+    return settings
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import gc
+from typing import Any, Dict
+
+from flask import Flask
+from gunicorn.app.base import BaseApplication
+
+from .server import preload_app
+
+
+def _close_project_types(app: Flask) -> None:
+    for project_type in app.extensions.get("project_types", {}).values():
+        project_type.close()
+
+
+def _post_fork(server, worker) -> None:
+    for project_type in worker.app.application.extensions.get("project_types", {}).values():
+        project_type.after_fork()
+
+
+def _worker_exit(server, worker) -> None:
+    _close_project_types(worker.app.application)
+
+
+def _on_exit(server) -> None:
+    _close_project_types(server.app.application)
+
+
+class GunicornServer(BaseApplication):
+    """Runs the portal under gunicorn with threaded (``gthread``) workers.
+
+    ``options`` are gunicorn settings. With ``preload``, the master loads
+    and warms the app once (``preload_app``) and freezes the collector
+    before forking, so workers share that memory copy-on-write. Workers
+    then run each type's ``after_fork`` and close the types when they exit,
+    as under ``PreforkServer``.
+    """
+
+    def __init__(self, app: Flask, options: Dict[str, Any], preload: bool = True) -> None:
+        self.application = app
+        self.options = options
+        self.preload = preload
+        super().__init__()
+
+    def load_config(self) -> None:
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+        self.cfg.set("worker_class", "gthread")
+        self.cfg.set("preload_app", self.preload)
+        self.cfg.set("post_fork", _post_fork)
+        self.cfg.set("worker_exit", _worker_exit)
+        self.cfg.set("on_exit", _on_exit)
+
+    def load(self) -> Flask:
+        # with preload_app, gunicorn calls this once in the master before forking
+        if self.preload:
+            preload_app(self.application)
+            gc.freeze()
+        return self.application
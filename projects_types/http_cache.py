@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import hashlib
+import os
+from datetime import datetime
+from typing import Any, Iterable, Optional
+
+from flask import Flask, Response, current_app, has_request_context, request
+from werkzeug.http import is_resource_modified
+
+
+# set in the environ of the requests ``flask build`` renders
+STATIC_EXPORT_ENVIRON_KEY = "mph.static_export"
+
+
+def is_static_export() -> bool:
+    """True while ``flask build`` renders the page: no server will answer query strings."""
+    return has_request_context() and bool(request.environ.get(STATIC_EXPORT_ENVIRON_KEY))
+
+
+def template_version(app: Flask) -> str:
+    """Fingerprint of the template files, part of every page ETag.
+
+    Computed once per process, or on every call when templates auto-reload
+    (debug mode), since that is the only time they can change under us.
+    """
+    auto_reload = app.config.get("TEMPLATES_AUTO_RELOAD")
+    if auto_reload is None:
+        auto_reload = app.debug
+    cached = app.extensions.get("template_version")
+    if cached and not auto_reload:
+        return cached
+
+    digest = hashlib.sha1()
+    template_folder = os.path.join(app.root_path, app.template_folder or "templates")
+    for directory, _, filenames in sorted(os.walk(template_folder)):
+        for filename in sorted(filenames):
+            path = os.path.join(directory, filename)
+            try:
+                stat_result = os.stat(path)
+            except OSError:
+                continue
+            digest.update(f"{path}:{stat_result.st_mtime_ns}:{stat_result.st_size}".encode("utf-8"))
+
+    version = digest.hexdigest()
+    app.extensions["template_version"] = version
+    return version
+
+
+def make_etag(*parts: Any) -> str:
+    """Strong ETag built from everything a rendered page depends on."""
+    digest = hashlib.sha1(repr(parts).encode("utf-8"))
+    digest.update(template_version(current_app).encode("ascii"))
+    # exported pages link differently (see is_static_export)
+    if is_static_export():
+        digest.update(b"static-export")
+    return digest.hexdigest()
+
+
+def not_modified(
+    etag: str, last_modified: Optional[datetime] = None, vary: Iterable[str] = ()
+) -> Optional[Response]:
+    """Return a 304 response when the client's validators still match, else ``None``."""
+    if request.method not in ("GET", "HEAD"):
+        return None
+    if is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+        return None
+    response = Response(status=304)
+    return add_validators(response, etag, last_modified, vary)
+
+
+def add_validators(
+    response: Response,
+    etag: str,
+    last_modified: Optional[datetime] = None,
+    vary: Iterable[str] = (),
+) -> Response:
+    """Attach ETag/Last-Modified and ask clients to revalidate before reuse."""
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.cache_control.no_cache = True
+    response.vary.update(vary)
+    return response
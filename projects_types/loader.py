@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import threading
+import time
+from importlib import import_module
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple, Type
+
+from flask import Flask
+import yaml
+
+from .base import ProjectType
+
+
+# Built-in types by import path: only the types that are configured get imported.
+TYPE_REGISTRY: Dict[str, str] = {
+    "flask": "projects_types.flask_type:FlaskProjectType",
+    "markdown": "projects_types.markdown_type:MarkdownProjectType",
+    "notion": "projects_types.notion_type:NotionProjectType",
+    "static": "projects_types.static_type:StaticProjectType",
+}
+
+
+class StartupTiming(NamedTuple):
+    """Seconds spent on each loading phase of one configured project type."""
+
+    config_file: str
+    identifier: str
+    import_seconds: float
+    init_seconds: float
+    environment_seconds: float
+    routes_seconds: float
+
+    @property
+    def total_seconds(self) -> float:
+        return self.import_seconds + self.init_seconds + self.environment_seconds + self.routes_seconds
+
+
+def _import_implementation(implementation_path: str) -> Type[ProjectType]:
+    if ":" in implementation_path:
+        module_name, class_name = implementation_path.split(":", 1)
+    else:
+        module_name, class_name = implementation_path.rsplit(".", 1)
+    module = import_module(module_name)
+    return getattr(module, class_name)
+
+
+def format_startup_report(timings: List[StartupTiming]) -> str:
+    """Render ``app.extensions["project_types_startup"]`` as a small table (milliseconds)."""
+    lines = [f"{'type':<12}{'import':>9}{'init':>9}{'env':>9}{'routes':>9}{'total':>9}"]
+    for timing in timings:
+        lines.append(
+            f"{timing.identifier:<12}"
+            + "".join(
+                f"{seconds * 1000:>9.1f}"
+                for seconds in (
+                    timing.import_seconds,
+                    timing.init_seconds,
+                    timing.environment_seconds,
+                    timing.routes_seconds,
+                    timing.total_seconds,
+                )
+            )
+        )
+    lines.append(f"{'all':<12}{sum(t.total_seconds for t in timings) * 1000:>45.1f}")
+    return "\n".join(lines)
+
+
+def _iter_config_files(config_dir: Path) -> Iterable[Path]:
+    patterns: List[str] = ["*.yml", "*.yaml"]
+    for pattern in patterns:
+        for path in sorted(config_dir.glob(pattern)):
+            if path.is_file():
+                yield path
+
+
+def _stat_signature(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        stat_result = path.stat()
+    except OSError:
+        return None
+    return (stat_result.st_mtime_ns, stat_result.st_size)
+
+
+def _load_type(
+    app: Flask, file_path: Path, registered: Dict[str, ProjectType]
+) -> Tuple[Optional[ProjectType], Optional[StartupTiming]]:
+    """Build, prepare and route one project type from its YAML file."""
+    try:
+        with file_path.open("r", encoding="utf-8") as handle:
+            config_data = yaml.safe_load(handle) or {}
+    except (OSError, yaml.YAMLError) as exc:
+        print(f"Ignoring {file_path.name}: unable to read it ({exc})")
+        return None, None
+
+    type_name = config_data.get("type")
+    if not type_name:
+        print(f"Ignoring {file_path.name}: missing 'type' field")
+        return None, None
+
+    implementation_path = config_data.get("implementation") or TYPE_REGISTRY.get(type_name)
+    if not implementation_path:
+        print(f"Ignoring {file_path.name}: unknown project type '{type_name}'")
+        return None, None
+
+    started = time.perf_counter()
+    try:
+        project_type_class = _import_implementation(implementation_path)
+    except (ValueError, ImportError, AttributeError) as exc:
+        print(
+            f"Ignoring {file_path.name}: unable to import implementation '{implementation_path}' ({exc})"
+        )
+        return None, None
+    imported = time.perf_counter()
+
+    try:
+        project_type = project_type_class(app, config_data)
+    except Exception as exc:  # pragma: no cover - defensive logging only
+        print(f"Unable to load {file_path.name}: {exc}")
+        return None, None
+    initialised = time.perf_counter()
+
+    if project_type.identifier in registered:
+        print(
+            f"Skipping {file_path.name}: identifier '{project_type.identifier}' already registered",
+        )
+        return None, None
+
+    project_type.ensure_environment()
+    prepared = time.perf_counter()
+    project_type.register_routes()
+    timing = StartupTiming(
+        file_path.name,
+        project_type.identifier,
+        imported - started,
+        initialised - imported,
+        prepared - initialised,
+        time.perf_counter() - prepared,
+    )
+    return project_type, timing
+
+
+class ProjectTypeReloader:
+    """Keeps ``app.extensions["project_types"]`` in line with the YAML files.
+
+    ``maybe_reload`` runs before requests and looks at the config directory
+    at most every ``interval`` seconds (one stat per file). Only files whose
+    mtime or size changed get a new ``ProjectType``; the others keep their
+    instance and its warm caches. The new mapping is swapped in with a single
+    assignment, and routes reach it through ``ProjectType.add_url_rule``'s
+    indirection, so no worker needs a restart.
+    """
+
+    def __init__(self, app: Flask, configs_dir: Path, interval: float = 2.0) -> None:
+        self.app = app
+        self.configs_dir = configs_dir
+        self.interval = float(interval)
+        # config file -> (stat signature, identifier it produced or None)
+        self._loaded: Dict[Path, Tuple[Optional[Tuple[int, int]], Optional[str]]] = {}
+        self._last_check = time.monotonic()
+        self._lock = threading.Lock()
+
+    def maybe_reload(self) -> None:
+        if time.monotonic() - self._last_check < self.interval:
+            return
+        # another thread is already reloading: serve with the current types
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            self._last_check = time.monotonic()
+            self._reload()
+        finally:
+            self._lock.release()
+
+    def reload(self) -> List[StartupTiming]:
+        """Apply every pending config change now; returns the timings of the types (re)built."""
+        with self._lock:
+            self._last_check = time.monotonic()
+            return self._reload()
+
+    def _reload(self) -> List[StartupTiming]:
+        current: Dict[str, ProjectType] = self.app.extensions.get("project_types", {})
+        registered: Dict[str, ProjectType] = {}
+        loaded: Dict[Path, Tuple[Optional[Tuple[int, int]], Optional[str]]] = {}
+        timings: List[StartupTiming] = []
+        changed = False
+
+        for file_path in _iter_config_files(self.configs_dir):
+            signature = _stat_signature(file_path)
+            previous = self._loaded.get(file_path)
+            if previous and previous[0] == signature:
+                identifier = previous[1]
+                if identifier in current and identifier not in registered:
+                    registered[identifier] = current[identifier]
+                loaded[file_path] = previous
+                continue
+
+            changed = True
+            project_type, timing = _load_type(self.app, file_path, registered)
+            if project_type is None:
+                # keep serving the last good version of a broken file
+                identifier = previous[1] if previous else None
+                if identifier in current and identifier not in registered:
+                    registered[identifier] = current[identifier]
+                loaded[file_path] = (signature, identifier)
+                continue
+
+            registered[project_type.identifier] = project_type
+            loaded[file_path] = (signature, project_type.identifier)
+            timings.append(timing)
+
+        if not changed and loaded.keys() == self._loaded.keys():
+            return timings
+
+        self._loaded = loaded
+        self.app.extensions["project_types"] = registered
+        for identifier, project_type in current.items():
+            if registered.get(identifier) is not project_type:
+                project_type.close()
+        return timings
+
@@ -0,0 +1,302 @@
+from __future__ import annotations
+
+import html
+import json
+import posixpath
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+from urllib.parse import unquote, urlsplit
+
+from .shared_cache import SharedCache, content_key
+
+if TYPE_CHECKING:
+    import markdown
+
+
+DEFAULT_RENDER_CACHE_MAX_BYTES = 32 * 1024 * 1024
+# namespace of rendered pages in a type's shared cache
+SHARED_RENDER_NAMESPACE = "markdown"
+# link targets in Markdown sources: [text](target), [label]: target, href="target"
+_SOURCE_LINK_PATTERN = re.compile(
+    r"\]\(\s*<?([^)\s>]+)|^\s{0,3}\[[^\]]+\]:\s*<?([^\s>]+)|href=\"([^\"]+)\"", re.MULTILINE
+)
+_HTML_HREF_PATTERN = re.compile(r'(<a\b[^>]*?\bhref=")([^"]*)(")')
+
+
+class RenderedPage(NamedTuple):
+    html: str
+    toc: str
+
+
+def extensions_fingerprint(extensions: List[Any], extension_configs: Dict[str, Any]) -> str:
+    """Stable string identifying an extension setup, used in cache keys."""
+    return json.dumps(
+        {"extensions": [str(item) for item in extensions], "configs": extension_configs},
+        sort_keys=True,
+        default=str,
+    )
+
+
+class MarkdownConverterPool:
+    """Pre-built ``markdown.Markdown`` converters for one extension setup.
+
+    Building a converter loads and configures every extension, so each thread
+    keeps its own instance and resets it between documents instead of going
+    through ``markdown.markdown()`` on every render.
+    """
+
+    def __init__(self, extensions: List[Any], extension_configs: Dict[str, Any]) -> None:
+        self.extensions = list(extensions)
+        self.extension_configs = dict(extension_configs)
+        self.fingerprint = extensions_fingerprint(self.extensions, self.extension_configs)
+        self._local = threading.local()
+
+    def _converter(self) -> markdown.Markdown:
+        converter = getattr(self._local, "converter", None)
+        if converter is None:
+            # imported on first render so that starting the host does not pay for it
+            import markdown
+
+            converter = markdown.Markdown(
+                extensions=self.extensions, extension_configs=self.extension_configs
+            )
+            self._local.converter = converter
+        return converter
+
+    def convert(self, text: str) -> RenderedPage:
+        converter = self._converter()
+        try:
+            html_content = converter.convert(text)
+            return RenderedPage(html_content, getattr(converter, "toc", ""))
+        finally:
+            converter.reset()
+
+
+class RenderedPageCache:
+    """Bounded LRU cache of rendered Markdown, keyed by source path.
+
+    Each entry remembers the signature (mtime, size, extension fingerprint)
+    it was rendered from; a lookup with a different signature is a miss and
+    the stale entry is replaced on the next ``put``. Entries are evicted
+    least-recently-used first once ``max_bytes`` is exceeded.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_RENDER_CACHE_MAX_BYTES) -> None:
+        self.max_bytes = max(0, int(max_bytes))
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, Tuple[Tuple[Any, ...], RenderedPage, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def get(self, key: str, signature: Tuple[Any, ...]) -> Optional[RenderedPage]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != signature:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: str, signature: Tuple[Any, ...], page: RenderedPage) -> None:
+        size = len(page.html) + len(page.toc)
+        if not self.enabled or size > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= previous[2]
+            self._entries[key] = (signature, page, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes and self._entries:
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+def lookup_rendered_page(
+    content: str, converter: MarkdownConverterPool, shared_cache: SharedCache
+) -> Tuple[str, Optional[RenderedPage]]:
+    """Shared-cache key of ``content`` and its stored rendering, if any."""
+    key = content_key(content, converter.fingerprint)
+    stored = shared_cache.get(SHARED_RENDER_NAMESPACE, key)
+    if stored is None:
+        return key, None
+    return key, RenderedPage(*json.loads(stored))
+
+
+def _store_page(shared_cache: SharedCache, key: str, page: RenderedPage) -> None:
+    shared_cache.put(SHARED_RENDER_NAMESPACE, key, json.dumps(page).encode("utf-8"))
+
+
+def render_markdown_file(
+    path: Path,
+    converter: MarkdownConverterPool,
+    cache: Optional[RenderedPageCache] = None,
+    shared_cache: Optional[SharedCache] = None,
+) -> RenderedPage:
+    """Render a Markdown file to HTML, reusing ``cache`` when the file is unchanged.
+
+    On a miss, ``shared_cache`` is looked up by the hash of the source and
+    the extension setup, so a page another worker (or a previous run)
+    rendered is not converted again.
+    """
+    signature: Tuple[Any, ...] = ()
+    if cache is not None and cache.enabled:
+        stat_result = path.stat()
+        signature = (stat_result.st_mtime_ns, stat_result.st_size, converter.fingerprint)
+        cached = cache.get(str(path), signature)
+        if cached is not None:
+            return cached
+
+    with path.open("r", encoding="utf-8") as handle:
+        content = handle.read()
+
+    page: Optional[RenderedPage] = None
+    if shared_cache is not None:
+        key, page = lookup_rendered_page(content, converter, shared_cache)
+    if page is None:
+        page = converter.convert(content)
+        if shared_cache is not None:
+            _store_page(shared_cache, key, page)
+
+    if signature:
+        cache.put(str(path), signature, page)
+    return page
+
+
+def store_rendered_page(path: Path, converter: MarkdownConverterPool, shared_cache: SharedCache) -> bool:
+    """Put the rendering of ``path`` in ``shared_cache``; ``False`` if it was already there."""
+    with path.open("r", encoding="utf-8") as handle:
+        content = handle.read()
+
+    key, page = lookup_rendered_page(content, converter, shared_cache)
+    if page is not None:
+        return False
+    _store_page(shared_cache, key, converter.convert(content))
+    return True
+
+
+def preload_rendered_pages(
+    paths: Iterable[Path],
+    converter: MarkdownConverterPool,
+    cache: RenderedPageCache,
+    shared_cache: SharedCache,
+) -> int:
+    """Fill ``cache`` with the stored renderings of ``paths``, converting nothing.
+
+    Stops once ``cache`` is full; returns how many pages were loaded.
+    """
+    loaded = 0
+    for path in paths:
+        if not cache.enabled or cache.current_bytes >= cache.max_bytes:
+            break
+        try:
+            stat_result = path.stat()
+            with path.open("r", encoding="utf-8") as handle:
+                content = handle.read()
+        except (OSError, UnicodeDecodeError):
+            continue
+
+        _, page = lookup_rendered_page(content, converter, shared_cache)
+        if page is not None:
+            cache.put(str(path), (stat_result.st_mtime_ns, stat_result.st_size, converter.fingerprint), page)
+            loaded += 1
+    return loaded
+
+
+def resolve_relative_link(href: str, page_dir: str) -> Optional[Tuple[str, str]]:
+    """``(project-relative path, fragment)`` a relative link of a page points at.
+
+    ``None`` for absolute URLs, bare fragments and paths leaving the project.
+    """
+    parts = urlsplit(href)
+    if parts.scheme or parts.netloc or not parts.path or parts.path.startswith("/"):
+        return None
+    target = posixpath.normpath(posixpath.join(page_dir, unquote(parts.path)))
+    if target == ".":
+        target = ""
+    if target == ".." or target.startswith("../"):
+        return None
+    return target, parts.fragment
+
+
+def rewrite_relative_links(page_html: str, page_dir: str, target_url: Callable[[str], Optional[str]]) -> str:
+    """Point the relative links of a rendered page at the URLs ``target_url`` gives.
+
+    The live server resolves ``api.md`` or ``../index.md`` itself; a static
+    build only has the pages' own URLs, under which relative paths would
+    point elsewhere. Links ``target_url`` does not know are left alone.
+    """
+
+    def replace(match: "re.Match[str]") -> str:
+        link = resolve_relative_link(html.unescape(match.group(2)), page_dir)
+        url = target_url(link[0]) if link else None
+        if url is None:
+            return match.group(0)
+        if link[1]:
+            url = f"{url}#{link[1]}"
+        return f"{match.group(1)}{html.escape(url)}{match.group(3)}"
+
+    return _HTML_HREF_PATTERN.sub(replace, page_html)
+
+
+def with_linked_pages(
+    documents: Iterable[Tuple[str, str, Path]],
+    resolve: Callable[[str, str], Optional[str]],
+    projects_dir: Path,
+) -> List[Tuple[str, str, Path]]:
+    """``documents`` plus every page their Markdown links reach, page to page.
+
+    Hidden files stay out of listings and search but are still served when
+    a page links to them, so a static build needs them too. ``resolve``
+    maps ``(project, page)`` to a project-relative file, as the views do.
+    """
+    pages = list(documents)
+    seen: Set[Tuple[str, str]] = {(project, relative_path) for project, relative_path, _ in pages}
+    pending = list(pages)
+    while pending:
+        project_name, relative_path, source = pending.pop()
+        if source.suffix.lower() != ".md":
+            continue
+        try:
+            content = source.read_text(encoding="utf-8")
+        except (OSError, UnicodeDecodeError):
+            continue
+        page_dir = posixpath.dirname(relative_path)
+        for match in _SOURCE_LINK_PATTERN.finditer(content):
+            link = resolve_relative_link(html.unescape(next(filter(None, match.groups()))), page_dir)
+            target = resolve(project_name, link[0]) if link else None
+            if target is None or (project_name, target) in seen:
+                continue
+            seen.add((project_name, target))
+            document = (project_name, target, projects_dir / project_name / target)
+            pages.append(document)
+            pending.append(document)
+    return pages
@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from flask import Flask, Response, current_app, g, has_request_context
+from flask.signals import before_render_template, template_rendered
+
+
+# Upper bounds (seconds) of the histogram buckets, tuned for page phases.
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+# Label used for requests that no project type handled (homepage, search, ...).
+HOST_LABEL = "host"
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "total", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float) -> None:
+        position = bisect_left(self.buckets, seconds)
+        if position < len(self.counts):
+            self.counts[position] += 1
+        self.total += seconds
+        self.count += 1
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(**labels: Any) -> str:
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items())
+
+
+class MetricsRegistry:
+    """In-process counters and histograms, rendered in the Prometheus text format.
+
+    Phases are labelled with the project type, the project (only once a view
+    has checked it exists, so arbitrary URLs cannot grow the label set) and
+    the phase name. Each process keeps its own registry: scrape every worker,
+    or let the Prometheus server aggregate them.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(sorted(buckets))
+        self._phases: Dict[Tuple[str, str, str], _Histogram] = {}
+        self._requests: Dict[Tuple[str, str], _Histogram] = {}
+        self._caches: Dict[Tuple[str, str, str], int] = {}
+        self._lock = threading.Lock()
+
+    def observe_phase(self, type_label: str, project: str, phase: str, seconds: float) -> None:
+        with self._lock:
+            histogram = self._phases.get((type_label, project, phase))
+            if histogram is None:
+                histogram = self._phases[(type_label, project, phase)] = _Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    def observe_request(self, type_label: str, project: str, seconds: float) -> None:
+        with self._lock:
+            histogram = self._requests.get((type_label, project))
+            if histogram is None:
+                histogram = self._requests[(type_label, project)] = _Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    def count_cache(self, type_label: str, cache: str, hit: bool) -> None:
+        key = (type_label, cache, "hit" if hit else "miss")
+        with self._lock:
+            self._caches[key] = self._caches.get(key, 0) + 1
+
+    def _histogram_lines(
+        self, name: str, help_text: str, histograms: Dict[Tuple[str, ...], _Histogram], label_names: Tuple[str, ...]
+    ) -> List[str]:
+        lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+        for key, histogram in sorted(histograms.items()):
+            labels = _labels(**dict(zip(label_names, key)))
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+            lines.append(f"{name}_sum{{{labels}}} {histogram.total:.6f}")
+            lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+        return lines
+
+    def render(self, app: Flask) -> str:
+        """The whole registry, plus the caches and load timings the types report themselves."""
+        caches: Dict[Tuple[str, str, str], int] = {}
+        for identifier, project_type in app.extensions.get("project_types", {}).items():
+            for cache, stats in project_type.cache_stats().items():
+                caches[(identifier, cache, "hit")] = stats.get("hits", 0)
+                caches[(identifier, cache, "miss")] = stats.get("misses", 0)
+
+        with self._lock:
+            lines = self._histogram_lines(
+                "projects_phase_seconds",
+                "Time spent in each phase of serving a page.",
+                self._phases,
+                ("type", "project", "phase"),
+            )
+            lines += self._histogram_lines(
+                "projects_request_seconds",
+                "Time until the response headers, per project.",
+                self._requests,
+                ("type", "project"),
+            )
+            caches.update(self._caches)
+
+        lines += [
+            "# HELP projects_cache_lookups_total Cache lookups by outcome.",
+            "# TYPE projects_cache_lookups_total counter",
+        ]
+        for (type_label, cache, result), count in sorted(caches.items()):
+            lines.append(
+                f"projects_cache_lookups_total{{{_labels(type=type_label, cache=cache, result=result)}}} {count}"
+            )
+
+        lines += [
+            "# HELP projects_type_load_seconds Time each project type took to load at startup.",
+            "# TYPE projects_type_load_seconds gauge",
+        ]
+        for timing in app.extensions.get("project_types_startup", []):
+            for phase in ("import", "init", "environment", "routes"):
+                labels = _labels(type=timing.identifier, phase=phase)
+                lines.append(f"projects_type_load_seconds{{{labels}}} {getattr(timing, f'{phase}_seconds'):.6f}")
+        return "\n".join(lines) + "\n"
+
+
+def _request_labels() -> Tuple[str, str]:
+    return getattr(g, "metrics_type", HOST_LABEL), getattr(g, "metrics_project", "")
+
+
+def record_phase(phase: str, seconds: float, type_label: Optional[str] = None, project: Optional[str] = None) -> None:
+    """Add ``seconds`` to ``phase`` of the current request (histogram and Server-Timing)."""
+    if not has_request_context():
+        return
+    registry = current_app.extensions.get("metrics")
+    if registry is None:
+        return
+    # the request keeps the labels of the type whose view handles it
+    if project is not None:
+        g.metrics_project = project
+    request_type, request_project = _request_labels()
+    if type_label is None or type_label == request_type:
+        type_label, project = request_type, request_project
+    registry.observe_phase(type_label, project or "", phase, seconds)
+    server_timing: Dict[str, float] = g.setdefault("server_timing", {})
+    server_timing[phase] = server_timing.get(phase, 0.0) + seconds
+
+
+@contextmanager
+def timed(phase: str, type_label: Optional[str] = None, project: Optional[str] = None) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_phase(phase, time.perf_counter() - started, type_label, project)
+
+
+def count_cache(type_label: str, cache: str, hit: bool) -> None:
+    if not has_request_context():
+        return
+    registry = current_app.extensions.get("metrics")
+    if registry is not None:
+        registry.count_cache(type_label, cache, hit)
+
+
+def server_timing_header(phases: Dict[str, float], total: Optional[float] = None) -> str:
+    entries = [f"{phase};dur={seconds * 1000:.2f}" for phase, seconds in phases.items()]
+    if total is not None:
+        entries.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(entries)
+
+
+def _start_request() -> None:
+    g.metrics_started = time.perf_counter()
+
+
+def _finish_request(response: Response) -> Response:
+    started = g.get("metrics_started")
+    if started is None:
+        return response
+    elapsed = time.perf_counter() - started
+    registry = current_app.extensions["metrics"]
+    registry.observe_request(*_request_labels(), elapsed)
+    if current_app.config.get("METRICS_SERVER_TIMING", True):
+        response.headers.add("Server-Timing", server_timing_header(g.get("server_timing", {}), elapsed))
+    return response
+
+
+def _template_started(sender: Flask, template, context, **extra: Any) -> None:
+    if has_request_context():
+        g.setdefault("template_timers", []).append(time.perf_counter())
+
+
+def _template_finished(sender: Flask, template, context, **extra: Any) -> None:
+    timers: List[float] = g.get("template_timers") if has_request_context() else None
+    if timers:
+        record_phase("template", time.perf_counter() - timers.pop())
+
+
+def init_metrics(app: Flask) -> MetricsRegistry:
+    """Create the app's registry and time every request and template render."""
+    registry = MetricsRegistry(tuple(app.config.get("METRICS_BUCKETS", DEFAULT_BUCKETS)))
+    app.extensions["metrics"] = registry
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    before_render_template.connect(_template_started, app)
+    template_rendered.connect(_template_finished, app)
+    return registry
+
+
+def metrics_response(app: Flask) -> Response:
+    registry: MetricsRegistry = app.extensions["metrics"]
+    return Response(registry.render(app), content_type=PROMETHEUS_CONTENT_TYPE)
+
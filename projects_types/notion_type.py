@@ -1,13 +1,38 @@
 from __future__ import annotations
 
-import csv
-from pathlib import Path
+import math
+import os
+import stat
+from pathlib import Path, PurePosixPath
 from typing import Any, Dict, List, Optional
 
-from flask import abort, redirect, render_template, url_for
-import markdown
+from flask import (
+    abort,
+    make_response,
+    redirect,
+    render_template,
+    request,
+    stream_template,
+    url_for,
+)
 
 from .base import ProjectType
+from .csv_index import DEFAULT_OFFSET_STRIDE, CsvIndexCache
+from .csv_query import CsvTableCache, DatabaseQuery, parse_database_query
+from .file_index import FileIndexRegistry, is_hidden_path
+from .fragments import FRAGMENT_VARY, render_fragment, wants_fragment
+from .http_cache import add_validators, is_static_export, make_etag, not_modified
+from .markdown_rendering import (
+    DEFAULT_RENDER_CACHE_MAX_BYTES,
+    MarkdownConverterPool,
+    RenderedPageCache,
+    preload_rendered_pages,
+    render_markdown_file,
+    rewrite_relative_links,
+    store_rendered_page,
+    with_linked_pages,
+)
+from .search_index import SearchIndex, extract_csv_text, extract_markdown_text
 
 
 class NotionProjectType(ProjectType):
@@ -22,55 +47,76 @@ class NotionProjectType(ProjectType):
         self.markdown_extension_configs = markdown_config.get(
             "extension_configs", {}
         )
+        self.markdown_converter = MarkdownConverterPool(
+            self.markdown_extensions, self.markdown_extension_configs
+        )
+        self.render_cache = RenderedPageCache(
+            markdown_config.get("render_cache_max_bytes", DEFAULT_RENDER_CACHE_MAX_BYTES)
+        )
+        self.preload_rendered = markdown_config.get("preload_rendered", True)
+        self.file_index = FileIndexRegistry(
+            self.projects_dir,
+            (".md", ".csv"),
+            self._file_entry,
+            raw_config.get("file_index", {}).get("refresh_interval", 2.0),
+        )
+        search_config = raw_config.get("search", {})
+        self.search_index = SearchIndex(
+            Path(
+                search_config.get("index_path")
+                or Path(app.instance_path) / "search" / f"{self.identifier}.sqlite3"
+            ),
+            search_config.get("refresh_interval", 30.0),
+            search_config.get("first_build_wait", 10.0),
+        )
+        database_config = raw_config.get("database", {})
+        self.database_page_size = int(database_config.get("page_size", 100))
+        self.database_max_page_size = int(database_config.get("max_page_size", 1000))
+        self.csv_indexes = CsvIndexCache(
+            database_config.get("offset_stride", DEFAULT_OFFSET_STRIDE),
+            self.shared_cache,
+        )
+        self.csv_tables = CsvTableCache(database_config.get("max_cached_tables", 8))
 
-    def list_projects(self) -> List[Dict[str, Any]]:
+    def scan_projects(self) -> List[Dict[str, Any]]:
         if not self.projects_root_exists():
             return []
 
         projects: List[Dict[str, Any]] = []
         for directory in sorted(self.projects_dir.iterdir()):
             if directory.is_dir():
-                project_id = directory.name
-                projects.append(
-                    {
-                        "id": project_id,
-                        "name": self.get_project_display_name(project_id),
-                        "emoji": self.get_project_emoji(project_id),
-                    }
-                )
+                projects.append(self.describe_project(directory.name))
         return projects
 
     def register_routes(self) -> None:
-        app = self.app
-
-        app.add_url_rule(
+        self.add_url_rule(
             "/notion",
             endpoint="notion_list",
             view_func=self._notion_list_view,
         )
 
-        app.add_url_rule(
+        self.add_url_rule(
             "/notion/<project_name>",
             endpoint="notion_project",
             view_func=self._notion_project_view,
             strict_slashes=False,
         )
 
-        app.add_url_rule(
+        self.add_url_rule(
             "/notion/<project_name>/<path:page>",
             endpoint="notion_page",
             view_func=self._notion_page_view,
         )
 
     def _notion_list_view(self):
-        projects = self.list_projects()
-        return render_template("notion_list.html", projects=projects)
+        return self.render_project_list("notion_list.html")
 
     def _notion_project_view(self, project_name: str):
         if not self._project_exists(project_name):
             abort(404)
 
-        default_file = self._resolve_notion_page(project_name, "")
+        with self.timed("index", project_name):
+            default_file = self._resolve_notion_page(project_name, "")
         if default_file:
             default_path = Path(default_file).with_suffix("")
             return redirect(
@@ -90,194 +136,326 @@ class NotionProjectType(ProjectType):
         if not self._project_exists(project_name):
             abort(404)
 
-        resolved = self._resolve_notion_page(project_name, page)
+        with self.timed("index", project_name):
+            resolved = self._resolve_notion_page(project_name, page)
         if not resolved:
             abort(404)
 
         notion_file = self.projects_dir / project_name / resolved
-        if not notion_file.exists() or not notion_file.is_file():
+        try:
+            source_stat = notion_file.stat()
+        except OSError:
             abort(404)
+        if not stat.S_ISREG(source_stat.st_mode):
+            abort(404)
+        is_database = notion_file.suffix.lower() == ".csv"
 
-        # Check if it's a CSV file (Notion database export)
-        if notion_file.suffix.lower() == ".csv":
-            csv_data = self._parse_csv_file(notion_file)
-            file_tree = self._build_file_tree(project_name)
-            project_config = self.load_project_config(project_name)
-
-            return render_template(
-                "notion_database.html",
-                project_name=project_name,
-                project_display_name=self.get_project_display_name(project_name),
-                project_emoji=self.get_project_emoji(project_name),
-                csv_data=csv_data,
-                file_tree=file_tree,
-                current_page=resolved,
-                config=project_config,
-            )
-        
-        # Otherwise, treat it as a Markdown file
-        with notion_file.open("r", encoding="utf-8") as handle:
-            content = handle.read()
-
-        html_content = markdown.markdown(
-            content,
-            extensions=self.markdown_extensions,
-            extension_configs=self.markdown_extension_configs,
-        )
-
-        file_tree = self._build_file_tree(project_name)
+        # validators first: an unchanged page costs a few stats and a 304
         project_config = self.load_project_config(project_name)
+        config_signature = self.project_config_signature(project_name)
+        index = self.file_index.get(project_name)
+        fragment = wants_fragment()
+        etag = make_etag(
+            self.identifier,
+            project_name,
+            resolved,
+            source_stat.st_mtime_ns,
+            source_stat.st_size,
+            config_signature,
+            index.digest if index else None,
+            # databases vary with paging/sorting/filtering, pages with the extensions
+            (request.query_string, self.database_page_size)
+            if is_database
+            else self.markdown_converter.fingerprint,
+            fragment,
+        )
+        # no Last-Modified: the ETag covers inputs (tree, templates, extensions)
+        # that no date can express, and If-Modified-Since alone would go stale
+        cached = not_modified(etag, vary=FRAGMENT_VARY)
+        if cached is not None:
+            return cached
 
-        return render_template(
-            "notion_page.html",
+        context = dict(
             project_name=project_name,
-            project_display_name=self.get_project_display_name(project_name),
-            project_emoji=self.get_project_emoji(project_name),
-            content=html_content,
-            file_tree=file_tree,
+            project_display_name=self.get_project_display_name(project_name, project_config),
+            project_emoji=self.get_project_emoji(project_name, project_config),
             current_page=resolved,
             config=project_config,
         )
 
-    def _parse_csv_file(self, csv_path: Path) -> Dict[str, Any]:
-        """Parse a CSV file and return headers and rows."""
-        headers = []
-        rows = []
-        
+        # Check if it's a CSV file (Notion database export)
+        if is_database:
+            template_name = "notion_database.html"
+            with self.timed("csv"):
+                context["csv_data"] = self._parse_csv_file(
+                    notion_file,
+                    page=request.args.get("page", 1, type=int),
+                    page_size=request.args.get("page_size", self.database_page_size, type=int),
+                    database_query=parse_database_query(request.args),
+                )
+        else:
+            # Otherwise, treat it as a Markdown file
+            template_name = "notion_page.html"
+            with self.timed("markdown"):
+                context["content"] = render_markdown_file(
+                    notion_file,
+                    self.markdown_converter,
+                    self.render_cache,
+                    self.shared_cache,
+                ).html
+                if is_static_export():
+                    context["content"] = rewrite_relative_links(
+                        context["content"],
+                        os.path.dirname(resolved),
+                        lambda target: self._exported_page_url(project_name, target),
+                    )
+
+        if fragment:
+            # SPA navigation inside the project: the sidebar is already on screen
+            response = render_fragment(template_name, **context)
+        else:
+            with self.timed("tree"):
+                file_tree = self._build_file_tree(project_name, project_config)
+            if is_database:
+                # rows are read lazily from disk while the template streams out
+                response = make_response(
+                    stream_template(template_name, file_tree=file_tree, **context)
+                )
+            else:
+                response = make_response(
+                    render_template(template_name, file_tree=file_tree, **context)
+                )
+        return add_validators(response, etag, vary=FRAGMENT_VARY)
+
+    def _parse_csv_file(
+        self,
+        csv_path: Path,
+        page: int = 1,
+        page_size: Optional[int] = None,
+        database_query: Optional[DatabaseQuery] = None,
+    ) -> Dict[str, Any]:
+        """Describe one page of a CSV file; ``rows`` is a lazy iterator over that page.
+
+        Plain browsing seeks through the row-offset index. Sorting, filtering
+        or searching runs against the cached in-memory table instead, and
+        only the requested slice of the matches is returned.
+        """
+        if page_size is None:
+            page_size = self.database_page_size
+        page_size = min(max(1, page_size), self.database_max_page_size)
+        if database_query is None:
+            database_query = DatabaseQuery()
+
+        headers: List[str] = []
+        total_rows = 0
+        matches: Optional[List[int]] = None
+        index = table = None
         try:
-            with csv_path.open("r", encoding="utf-8") as csvfile:
-                reader = csv.reader(csvfile)
-                headers = next(reader, [])
-                rows = list(reader)
+            if database_query.is_empty:
+                index = self.csv_indexes.get(csv_path)
+            else:
+                table = self.csv_tables.get(csv_path)
         except Exception as e:
             print(f"Error parsing CSV file {csv_path}: {e}")
-        
+
+        if index is not None:
+            headers = index.headers
+            total_rows = index.row_count
+        elif table is not None:
+            headers = table.headers
+            total_rows = table.row_count
+            matches = table.query(database_query)
+
+        row_count = total_rows if matches is None else len(matches)
+        page_count = max(1, math.ceil(row_count / page_size))
+        page = min(max(1, page), page_count)
+        start = (page - 1) * page_size
+
+        if index is not None:
+            rows = index.iter_rows(start, page_size)
+        elif table is not None:
+            rows = (table.rows[position] for position in matches[start:start + page_size])
+        else:
+            rows = iter(())
+
         return {
             "filename": csv_path.name,
             "headers": headers,
             "rows": rows,
+            "row_count": row_count,
+            "total_rows": total_rows,
+            "page": page,
+            "page_size": page_size,
+            "page_count": page_count,
+            "first_row": start + 1 if row_count else 0,
+            "last_row": min(start + page_size, row_count),
+            "query": database_query.as_params(),
+            "sort": database_query.sort,
+            "order": "desc" if database_query.descending else "asc",
+            "search": database_query.search,
+        }
+
+    def preload(self) -> None:
+        for project in self.list_projects():
+            self.file_index.get(project["id"])
+        self.search_index.sync(self._search_documents(), self._search_text)
+        if self.preload_rendered and self.shared_cache.enabled:
+            preload_rendered_pages(
+                (path for path in self.warm_sources() if path.suffix.lower() != ".csv"),
+                self.markdown_converter,
+                self.render_cache,
+                self.shared_cache,
+            )
+
+    def warm_sources(self) -> List[Path]:
+        return [path for _, _, path in self._search_documents()]
+
+    def warm(self, path: Path) -> bool:
+        if path.suffix.lower() == ".csv":
+            return self.csv_indexes.prepare(path)
+        return store_rendered_page(path, self.markdown_converter, self.shared_cache)
+
+    def cache_stats(self) -> Dict[str, Dict[str, int]]:
+        return {
+            "markdown_render": self.render_cache.stats(),
+            "shared_cache": self.shared_cache.stats(),
+            "csv_index": {"hits": self.csv_indexes.hits, "misses": self.csv_indexes.misses},
+            "csv_table": {"hits": self.csv_tables.hits, "misses": self.csv_tables.misses},
         }
 
+    def export_paths(self) -> List[str]:
+        paths = [url_for("notion_list")]
+        for project in self.list_projects():
+            paths.append(url_for("notion_project", project_name=project["id"]))
+        # the documents the search index publishes, and hidden ones they link to
+        for project_name, relative_path, source in with_linked_pages(
+            self._search_documents(), self._resolve_notion_page, self.projects_dir
+        ):
+            page_url = url_for(
+                "notion_page", project_name=project_name, page=os.path.splitext(relative_path)[0]
+            )
+            paths.append(page_url)
+            if source.suffix.lower() == ".csv":
+                # every page of a database, in file order (the export writes them
+                # to <database>/page/N/, where the exported pagination links)
+                index = self.csv_indexes.get(source)
+                page_count = math.ceil(index.row_count / self.database_page_size) if index else 1
+                paths.extend(f"{page_url}?page={number}" for number in range(2, page_count + 1))
+        return paths
+
+    def search(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+        # the index is brought up to date on a background thread; only its
+        # very first build is waited for (see search_ready)
+        self.search_index.refresh(self._search_documents, self._search_text)
+
+        results: List[Dict[str, Any]] = []
+        for hit in self.search_index.search(query, limit):
+            project_config = self.load_project_config(hit.project)
+            results.append(
+                {
+                    "type": self.label,
+                    "project": hit.project,
+                    "project_name": self.get_project_display_name(hit.project, project_config),
+                    "emoji": self.get_project_emoji(hit.project, project_config),
+                    "path": hit.path,
+                    "title": hit.title,
+                    "snippet": hit.snippet,
+                    "url": url_for(
+                        "notion_page",
+                        project_name=hit.project,
+                        page=os.path.splitext(hit.path)[0],
+                        # databases open already filtered on the query
+                        **({"q": query} if hit.path.lower().endswith(".csv") else {}),
+                    ),
+                    "score": hit.score,
+                }
+            )
+        return results
+
+    def search_ready(self) -> bool:
+        return self.search_index.built
+
+    def _search_documents(self):
+        for project in self.list_projects():
+            project_name = project["id"]
+            index = self.file_index.get(project_name)
+            if index is None:
+                continue
+            project_config = self.load_project_config(project_name)
+            hidden_files = set(
+                project_config.get("notion", {}).get("hidden_files", [])
+            )
+            hidden_folders = set(
+                project_config.get("notion", {}).get("hidden_folders", [])
+            )
+            for relative_path in index.files():
+                if not is_hidden_path(relative_path, hidden_files, hidden_folders):
+                    yield project_name, relative_path, self.projects_dir / project_name / relative_path
+
+    def _search_text(self, path: Path):
+        if path.suffix.lower() == ".csv":
+            return extract_csv_text(path)
+        return extract_markdown_text(path)
+
     def _project_exists(self, project_name: str) -> bool:
         project_directory = self.projects_dir / project_name
         return project_directory.is_dir()
 
+    def _file_entry(self, name: str, relative_path: str) -> Dict[str, Any]:
+        stem, suffix = os.path.splitext(relative_path)
+        return {
+            "name": name,
+            "path": relative_path,
+            "slug": stem,
+            "type": "database" if suffix.lower() == ".csv" else "page",
+        }
+
     def _gather_notion_files(self, project_name: str) -> List[str]:
-        project_directory = self.projects_dir / project_name
-        if not project_directory.exists():
+        index = self.file_index.get(project_name)
+        if index is None:
             return []
 
         project_config = self.load_project_config(project_name)
         hidden_files = set(
             project_config.get("notion", {}).get("hidden_files", [])
         )
+        return [path for path in index.files() if path not in hidden_files]
 
-        notion_files: List[str] = []
-        for file_path in project_directory.rglob("*"):
-            if file_path.is_file() and file_path.suffix.lower() in [".md", ".csv"]:
-                relative_path = file_path.relative_to(project_directory)
-                relative_str = str(relative_path).replace("\\", "/")
-                if relative_str not in hidden_files:
-                    notion_files.append(relative_str)
-
-        return sorted(notion_files)
-
-    def _build_file_tree(self, project_name: str) -> Dict[str, Any]:
-        project_directory = self.projects_dir / project_name
-        if not project_directory.exists():
+    def _build_file_tree(
+        self, project_name: str, project_config: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        index = self.file_index.get(project_name)
+        if index is None:
             return {}
 
-        project_config = self.load_project_config(project_name)
+        if project_config is None:
+            project_config = self.load_project_config(project_name)
         hidden_files = set(
             project_config.get("notion", {}).get("hidden_files", [])
         )
         hidden_folders = set(
             project_config.get("notion", {}).get("hidden_folders", [])
         )
-
-        def build_tree(path: Path, base_path: Path, current_path: str = "") -> Dict[str, Any]:
-            tree: Dict[str, Any] = {"files": [], "folders": {}}
-            try:
-                items = sorted(
-                    path.iterdir(), key=lambda element: (not element.is_file(), element.name.lower())
-                )
-            except PermissionError:
-                return tree
-
-            for item in items:
-                if item.is_file() and item.suffix.lower() in [".md", ".csv"]:
-                    relative = item.relative_to(base_path)
-                    relative_str = str(relative).replace("\\", "/")
-                    if relative_str not in hidden_files:
-                        slug = str(relative.with_suffix("")).replace("\\", "/")
-                        file_type = "database" if item.suffix.lower() == ".csv" else "page"
-                        tree["files"].append(
-                            {
-                                "name": item.name,
-                                "path": relative_str,
-                                "slug": slug,
-                                "type": file_type,
-                            }
-                        )
-                elif item.is_dir():
-                    folder_name = item.name
-                    folder_path = f"{current_path}/{folder_name}".lstrip("/")
-                    if folder_name not in hidden_folders and folder_path not in hidden_folders:
-                        tree["folders"][folder_name] = build_tree(item, base_path, folder_path)
-
-            return tree
-
-        return build_tree(project_directory, project_directory)
+        return index.build_tree(hidden_files, hidden_folders)
 
     def _resolve_notion_page(self, project_name: str, page: str) -> Optional[str]:
-        project_directory = self.projects_dir / project_name
-        normalized = page.strip("/")
-
-        if not normalized:
-            return self._default_notion_file(project_name, Path("."))
-
-        candidate = project_directory / normalized
-        if candidate.is_file() and candidate.suffix.lower() in [".md", ".csv"]:
-            return str(candidate.relative_to(project_directory).as_posix())
-
-        if candidate.suffix.lower() not in [".md", ".csv"]:
-            parent = candidate.parent if candidate.parent != project_directory else project_directory
-            stem = candidate.name
-            if parent.exists():
-                for file_path in parent.iterdir():
-                    if (
-                        file_path.is_file()
-                        and file_path.suffix.lower() in [".md", ".csv"]
-                        and file_path.stem == stem
-                    ):
-                        return str(file_path.relative_to(project_directory).as_posix())
-
-        if candidate.exists() and candidate.is_dir():
-            return self._default_notion_file(project_name, Path(normalized))
-
-        return None
+        index = self.file_index.get(project_name)
+        if index is None:
+            return None
 
-    def _default_notion_file(self, project_name: str, relative_dir: Path) -> Optional[str]:
-        project_directory = self.projects_dir / project_name
-        target = project_directory / relative_dir
+        normalized = page.strip("/")
+        if normalized:
+            normalized = PurePosixPath(normalized).as_posix()
+        return index.resolve(normalized)
 
-        if not target.exists() or not target.is_dir():
+    def _exported_page_url(self, project_name: str, page: str) -> Optional[str]:
+        resolved = self._resolve_notion_page(project_name, page)
+        if resolved is None:
             return None
+        return url_for("notion_page", project_name=project_name, page=os.path.splitext(resolved)[0])
 
-        notion_files = [
-            item for item in target.iterdir() 
-            if item.is_file() and item.suffix.lower() in [".md", ".csv"]
-        ]
-        if not notion_files:
+    def _default_notion_file(self, project_name: str, relative_dir: str) -> Optional[str]:
+        index = self.file_index.get(project_name)
+        if index is None:
             return None
-
-        for candidate in notion_files:
-            if candidate.name.lower() == "readme.md":
-                return str((relative_dir / candidate.name).as_posix()).lstrip("./")
-
-        for candidate in notion_files:
-            if candidate.name.lower() == "index.md":
-                return str((relative_dir / candidate.name).as_posix()).lstrip("./")
-
-        chosen = sorted(notion_files, key=lambda element: element.name.lower())[0]
-        return str((relative_dir / chosen.name).as_posix()).lstrip("./")
+        return index.default_file(relative_dir)
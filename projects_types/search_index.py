@@ -0,0 +1,407 @@
+from __future__ import annotations
+
+import csv
+import io
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from markupsafe import Markup, escape
+
+
+# CSV rows indexed together: small enough for BM25 to rank them cheaply
+CSV_ROWS_PER_PART = 50
+# tokens shown around the first match of a hit
+SNIPPET_TOKENS = 16
+# bump when the tables change: older index files are dropped and rebuilt
+_SCHEMA_VERSION = 2
+_SCHEMA = (
+    "DROP TABLE IF EXISTS documents_fts",
+    "DROP TABLE IF EXISTS parts",
+    "DROP TABLE IF EXISTS documents",
+    "DROP TABLE IF EXISTS state",
+    """
+    CREATE TABLE documents (
+        id INTEGER PRIMARY KEY,
+        project TEXT NOT NULL,
+        path TEXT NOT NULL,
+        source TEXT NOT NULL,
+        title TEXT NOT NULL,
+        mtime_ns INTEGER NOT NULL,
+        size INTEGER NOT NULL,
+        UNIQUE (project, path)
+    )
+    """,
+    # a part is a byte range of its source; its rowid is the one in documents_fts
+    """
+    CREATE TABLE parts (
+        id INTEGER PRIMARY KEY,
+        document_id INTEGER NOT NULL,
+        start INTEGER NOT NULL,
+        length INTEGER NOT NULL
+    )
+    """,
+    "CREATE INDEX parts_document ON parts (document_id)",
+    # contentless: the text stays in the source files
+    """
+    CREATE VIRTUAL TABLE documents_fts USING fts5(
+        title, body, content = '', tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    "CREATE TABLE state (key TEXT PRIMARY KEY, value INTEGER NOT NULL)",
+)
+
+_TERM_PATTERN = re.compile(r"\w+", re.UNICODE)
+_HEADING_PATTERN = re.compile(r"^\s{0,3}#{1,6}\s+(.+?)\s*#*\s*$", re.MULTILINE)
+
+
+class DocumentPart(NamedTuple):
+    """Text indexed as one FTS5 row, and the bytes of the source it came from."""
+
+    start: int
+    length: int
+    body: str
+
+
+TextExtractor = Callable[[Path], Tuple[str, Iterable[DocumentPart]]]
+# (project, relative path, source file) of every document to index
+Documents = Iterable[Tuple[str, str, Path]]
+
+
+class SearchHit(NamedTuple):
+    project: str
+    path: str
+    title: str
+    snippet: Markup
+    score: float
+
+
+def extract_markdown_text(path: Path) -> Tuple[str, List[DocumentPart]]:
+    """Return ``(title, parts)`` for a Markdown page: one part, titled by its first heading."""
+    data = path.read_bytes()
+    body = data.decode("utf-8", errors="replace")
+    heading = _HEADING_PATTERN.search(body)
+    title = heading.group(1) if heading else path.stem
+    return title, [DocumentPart(0, len(data), body)]
+
+
+def extract_csv_text(path: Path) -> Tuple[str, Iterator[DocumentPart]]:
+    """Return ``(title, parts)`` for a CSV database: ``CSV_ROWS_PER_PART`` rows per part."""
+    return path.stem, _csv_parts(path, CSV_ROWS_PER_PART)
+
+
+def _csv_parts(path: Path, rows_per_part: int) -> Iterator[DocumentPart]:
+    consumed = 0
+
+    def lines(handle) -> Iterator[str]:
+        # csv.reader pulls exactly the lines of one record per row (see csv_index)
+        nonlocal consumed
+        for raw_line in handle:
+            consumed += len(raw_line)
+            yield raw_line.decode("utf-8", errors="replace")
+
+    with path.open("rb") as handle:
+        start = 0
+        rows: List[List[str]] = []
+        for row in csv.reader(lines(handle)):
+            rows.append(row)
+            if len(rows) == rows_per_part:
+                yield DocumentPart(start, consumed - start, _rows_text(rows))
+                start, rows = consumed, []
+        if rows:
+            yield DocumentPart(start, consumed - start, _rows_text(rows))
+
+
+def _rows_text(rows: List[List[str]]) -> str:
+    return "\n".join(" · ".join(row) for row in rows).lstrip("\ufeff")
+
+
+def read_part_text(source: Path, start: int, length: int) -> str:
+    """The text a part was indexed from, read back from its source."""
+    with source.open("rb") as handle:
+        handle.seek(start)
+        text = handle.read(length).decode("utf-8", errors="replace")
+    if source.suffix.lower() == ".csv":
+        return _rows_text(list(csv.reader(io.StringIO(text, newline=""))))
+    return text
+
+
+def build_match_query(query: str) -> str:
+    """Turn free text into an FTS5 query: every term required, last one as a prefix."""
+    terms = _TERM_PATTERN.findall(query)
+    if not terms:
+        return ""
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def _fold(text: str) -> str:
+    # what the unicode61 tokenizer compares: no case, no diacritics
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(character for character in decomposed if not unicodedata.combining(character))
+
+
+def make_snippet(text: str, query: str, size: int = SNIPPET_TOKENS) -> Markup:
+    """``size`` tokens of ``text`` around the first match of ``query``, matches in ``<mark>``."""
+    terms = [_fold(term) for term in _TERM_PATTERN.findall(query)]
+    tokens = list(_TERM_PATTERN.finditer(text))
+    if not terms or not tokens:
+        return Markup("")
+
+    def matches(token: str) -> bool:
+        folded = _fold(token)
+        return folded in terms[:-1] or folded.startswith(terms[-1])
+
+    first = next((index for index, token in enumerate(tokens) if matches(token.group())), 0)
+    begin = max(0, min(first - 3, len(tokens) - size))
+    end = min(len(tokens), begin + size)
+
+    pieces = ["…"] if begin > 0 else []
+    position = tokens[begin].start()
+    for token in tokens[begin:end]:
+        pieces.append(str(escape(text[position:token.start()])))
+        word = str(escape(token.group()))
+        pieces.append(f"<mark>{word}</mark>" if matches(token.group()) else word)
+        position = token.end()
+    if end < len(tokens):
+        pieces.append("…")
+    return Markup(" ".join("".join(pieces).split()))
+
+
+class SearchIndex:
+    """Persistent full-text index of one project type's documents.
+
+    Each document is indexed as one or more parts (a Markdown page whole,
+    a CSV database ``CSV_ROWS_PER_PART`` rows at a time), so ranking a
+    match in a large database only weighs a few rows. The FTS5 table is
+    contentless: a part only remembers its byte range in the source, and
+    snippets are cut from the source for the hits shown. Parts of changed
+    documents cannot be removed from a contentless table, so they are
+    unlinked and the table is rebuilt once they outnumber the live ones.
+
+    A catalogue keeps the (mtime, size) each document was indexed from:
+    ``sync`` only re-reads files whose signature changed and drops files
+    that disappeared, so a restart reuses the index on disk. Searches do
+    not wait for a sync, except for the very first build (see ``refresh``).
+    Every process and thread opens its own connection, so worker processes
+    forked by ``flask serve`` share the file but not a connection.
+    """
+
+    def __init__(
+        self, database_path: Path, refresh_interval: float = 30.0, first_build_wait: float = 10.0
+    ) -> None:
+        self.database_path = database_path
+        self.refresh_interval = float(refresh_interval)
+        self.first_build_wait = float(first_build_wait)
+        self._last_sync = float("-inf")
+        self._built = False
+        self._local = threading.local()
+        # held for the whole of a sync; searches do not take it
+        self._sync_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._sync_thread: Optional[threading.Thread] = None
+
+    @property
+    def _connection(self) -> sqlite3.Connection:
+        # opened on first use so importing a project type never touches the disk
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            self.database_path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(str(self.database_path), timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            self._migrate(connection)
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    @staticmethod
+    def _migrate(connection: sqlite3.Connection) -> None:
+        if connection.execute("PRAGMA user_version").fetchone()[0] == _SCHEMA_VERSION:
+            return
+        # another process may be migrating too: check again once holding the write lock
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            if connection.execute("PRAGMA user_version").fetchone()[0] != _SCHEMA_VERSION:
+                for statement in _SCHEMA:
+                    connection.execute(statement)
+                connection.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+            connection.commit()
+        except BaseException:
+            connection.rollback()
+            raise
+
+    def _state(self, key: str) -> int:
+        row = self._connection.execute("SELECT value FROM state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else 0
+
+    def _set_state(self, key: str, value: int) -> None:
+        self._connection.execute(
+            "INSERT OR REPLACE INTO state (key, value) VALUES (?, ?)", (key, value)
+        )
+
+    @property
+    def built(self) -> bool:
+        """Whether a sync ever completed for this index file (in any process)."""
+        if not self._built:
+            self._built = bool(self._state("built"))
+        return self._built
+
+    def is_stale(self) -> bool:
+        return time.monotonic() - self._last_sync >= self.refresh_interval
+
+    def refresh(self, documents: Callable[[], Documents], extractor: TextExtractor) -> bool:
+        """Start a background ``sync`` if the index is stale; returns whether it is built.
+
+        Later syncs never hold a search up, but an index that was never
+        built would answer nothing: the first build is waited for, up to
+        ``first_build_wait`` seconds.
+        """
+        if self.is_stale():
+            with self._lock:
+                if self._sync_thread is None or not self._sync_thread.is_alive():
+                    # a failing sync is retried after a full interval, not on every search
+                    self._last_sync = time.monotonic()
+                    self._sync_thread = threading.Thread(
+                        target=self._background_sync,
+                        args=(documents, extractor),
+                        name=f"search-sync-{self.database_path.stem}",
+                        daemon=True,
+                    )
+                    self._sync_thread.start()
+
+        if self.built:
+            return True
+        thread = self._sync_thread
+        if thread is not None:
+            thread.join(self.first_build_wait)
+        return self.built
+
+    def _background_sync(self, documents: Callable[[], Documents], extractor: TextExtractor) -> None:
+        try:
+            self.sync(documents(), extractor)
+        except Exception as exc:  # pragma: no cover - defensive logging only
+            print(f"Error syncing {self.database_path}: {exc}")
+
+    def _compact(self) -> None:
+        """Rebuild from scratch once unlinked parts outnumber live ones."""
+        unlinked = self._state("unlinked_parts")
+        if not unlinked or unlinked <= self._connection.execute("SELECT COUNT(*) FROM parts").fetchone()[0]:
+            return
+        self._connection.execute("INSERT INTO documents_fts (documents_fts) VALUES ('delete-all')")
+        self._connection.execute("DELETE FROM parts")
+        self._connection.execute("DELETE FROM documents")
+        self._set_state("unlinked_parts", 0)
+
+    def _unlink_parts(self, document_id: int) -> None:
+        unlinked = self._connection.execute(
+            "DELETE FROM parts WHERE document_id = ?", (document_id,)
+        ).rowcount
+        self._set_state("unlinked_parts", self._state("unlinked_parts") + unlinked)
+
+    def sync(self, documents: Documents, extractor: TextExtractor) -> int:
+        """Bring the index in line with ``documents``; returns how many were (re)indexed."""
+        with self._sync_lock, self._connection:
+            self._compact()
+            known: Dict[Tuple[str, str], Tuple[int, int, int]] = {
+                (project, path): (document_id, mtime_ns, size)
+                for document_id, project, path, mtime_ns, size in self._connection.execute(
+                    "SELECT id, project, path, mtime_ns, size FROM documents"
+                )
+            }
+
+            updated = 0
+            for project, relative_path, source in documents:
+                key = (project, relative_path)
+                previous = known.pop(key, None)
+                try:
+                    stat_result = source.stat()
+                except OSError:
+                    continue
+                signature = (stat_result.st_mtime_ns, stat_result.st_size)
+                if previous and previous[1:] == signature:
+                    continue
+
+                try:
+                    title, parts = extractor(source)
+                    rows = [(title, part.body, part.start, part.length) for part in parts]
+                except Exception as exc:  # pragma: no cover - defensive logging only
+                    print(f"Error indexing {source}: {exc}")
+                    continue
+
+                if previous:
+                    document_id = previous[0]
+                    self._unlink_parts(document_id)
+                    self._connection.execute(
+                        "UPDATE documents SET source = ?, title = ?, mtime_ns = ?, size = ? WHERE id = ?",
+                        (str(source), title, *signature, document_id),
+                    )
+                else:
+                    document_id = self._connection.execute(
+                        "INSERT INTO documents (project, path, source, title, mtime_ns, size) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        (project, relative_path, str(source), title, *signature),
+                    ).lastrowid
+                for title, body, start, length in rows:
+                    part_id = self._connection.execute(
+                        "INSERT INTO parts (document_id, start, length) VALUES (?, ?, ?)",
+                        (document_id, start, length),
+                    ).lastrowid
+                    self._connection.execute(
+                        "INSERT INTO documents_fts (rowid, title, body) VALUES (?, ?, ?)",
+                        (part_id, title, body),
+                    )
+                updated += 1
+
+            for document_id, _, _ in known.values():
+                self._unlink_parts(document_id)
+                self._connection.execute("DELETE FROM documents WHERE id = ?", (document_id,))
+
+            self._set_state("built", 1)
+            self._last_sync = time.monotonic()
+            return updated + len(known)
+
+    def search(self, query: str, limit: int = 20) -> List[SearchHit]:
+        """Return the best document for ``query``, ranked by BM25 of its best part (titles weigh more)."""
+        match_query = build_match_query(query)
+        if not match_query:
+            return []
+
+        try:
+            # bm25() is not allowed inside an aggregate: rank the parts first, then
+            # keep each document's best one (bare columns of MIN() come from its row)
+            rows = self._connection.execute(
+                """
+                WITH ranked AS MATERIALIZED (
+                    SELECT rowid AS part_id, bm25(documents_fts, 5.0, 1.0) AS rank
+                    FROM documents_fts
+                    WHERE documents_fts MATCH ?
+                )
+                SELECT documents.project, documents.path, documents.source, documents.title,
+                       parts.start, parts.length, MIN(ranked.rank) AS best
+                FROM ranked
+                JOIN parts ON parts.id = ranked.part_id
+                JOIN documents ON documents.id = parts.document_id
+                GROUP BY parts.document_id
+                ORDER BY best
+                LIMIT ?
+                """,
+                (match_query, limit),
+            ).fetchall()
+        except sqlite3.OperationalError as exc:  # pragma: no cover - defensive logging only
+            print(f"Error searching {self.database_path}: {exc}")
+            return []
+
+        hits: List[SearchHit] = []
+        for project, path, source, title, start, length, rank in rows:
+            try:
+                snippet = make_snippet(read_part_text(Path(source), start, length), query)
+            except OSError:
+                snippet = Markup("")
+            hits.append(SearchHit(project, path, title, snippet, -rank))
+        return hits
@@ -0,0 +1,323 @@
+from __future__ import annotations
+
+import gc
+import importlib.util
+import math
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from socketserver import BaseServer
+from typing import Dict, Optional
+from wsgiref.simple_server import ServerHandler, WSGIRequestHandler, WSGIServer
+
+from flask import Flask
+
+
+DEFAULT_THREADS = 8
+DEFAULT_TIMEOUT = 30.0
+DEFAULT_GRACEFUL_TIMEOUT = 30.0
+DEFAULT_BACKLOG = 2048
+# a worker dying this soon after its start is not respawned in a loop
+RESPAWN_DELAY = 1.0
+
+
+class _SendfileHandler(ServerHandler):
+    """wsgiref handler that sends ``wsgi.file_wrapper`` bodies with ``os.sendfile``."""
+
+    def __init__(self, *args, connection: socket.socket, **kwargs) -> None:
+        super().__init__(*args, multithread=True, multiprocess=True, **kwargs)
+        self.connection = connection
+
+    def sendfile(self) -> bool:
+        filelike = self.result.filelike
+        try:
+            in_fd = filelike.fileno()
+            offset = filelike.tell()
+        except (AttributeError, OSError):
+            return False
+        length = self.headers.get("Content-Length")
+        if length is None:
+            length = os.fstat(in_fd).st_size - offset
+        remaining = int(length)
+
+        self.send_headers()
+        self._flush()
+        # the connection has a timeout, so it is non-blocking underneath:
+        # socket.sendfile waits for it to drain (up to the timeout) between
+        # os.sendfile calls instead of failing with BlockingIOError
+        try:
+            self.connection.sendfile(filelike, offset, remaining)
+        finally:
+            # it leaves the file after the last byte sent, even on a timeout
+            self.bytes_sent += filelike.tell() - offset
+        return True
+
+
+class _RequestHandler(WSGIRequestHandler):
+    def handle(self) -> None:
+        self.raw_requestline = self.rfile.readline(65537)
+        if len(self.raw_requestline) > 65536:
+            self.send_error(414)
+            return
+        if not self.parse_request():
+            return
+
+        handler = _SendfileHandler(
+            self.rfile,
+            self.wfile,
+            self.get_stderr(),
+            self.get_environ(),
+            connection=self.connection,
+        )
+        handler.request_handler = self
+        handler.run(self.server.get_app())
+
+    def log_request(self, code="-", size="-") -> None:
+        # access logs belong to the reverse proxy
+        pass
+
+
+class _WorkerServer(WSGIServer):
+    """WSGI server of one worker process, on the socket inherited from the master.
+
+    A connection is only accepted while one of the ``threads`` is free, so a
+    busy worker leaves new clients to its siblings instead of queueing them.
+    """
+
+    def __init__(self, listener: socket.socket, app, threads: int, timeout: float) -> None:
+        BaseServer.__init__(self, listener.getsockname()[:2], _RequestHandler)
+        self.socket = listener
+        host, port = listener.getsockname()[:2]
+        self.server_name = host
+        self.server_port = port
+        self.setup_environ()
+        self.set_app(app)
+        self.connection_timeout = timeout
+        self._slots = threading.BoundedSemaphore(threads)
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="serve")
+
+    def _handle_request_noblock(self) -> None:
+        self._slots.acquire()
+        try:
+            # the listener is non-blocking: a sibling may have taken the connection
+            request, client_address = self.get_request()
+        except OSError:
+            self._slots.release()
+            return
+        request.settimeout(self.connection_timeout)
+        self._executor.submit(self._process, request, client_address)
+
+    def _process(self, request: socket.socket, client_address) -> None:
+        try:
+            self.finish_request(request, client_address)
+        except Exception:  # pragma: no cover - defensive logging only
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self._slots.release()
+
+    def drain(self) -> None:
+        """Wait for the requests in progress after ``shutdown()`` stopped accepting."""
+        self._executor.shutdown(wait=True)
+
+
+def preload_app(app: Flask) -> None:
+    """Warm every project type so its caches are shared copy-on-write by the workers."""
+    with app.app_context():
+        for project_type in app.extensions.get("project_types", {}).values():
+            try:
+                project_type.preload()
+            except Exception as exc:  # pragma: no cover - defensive logging only
+                print(f"Unable to preload {project_type.identifier}: {exc}")
+
+
+def _worker_main(app: Flask, listener: socket.socket, threads: int, timeout: float) -> None:
+    for project_type in app.extensions.get("project_types", {}).values():
+        project_type.after_fork()
+
+    server = _WorkerServer(listener, app, threads, timeout)
+
+    def stop(signum, frame) -> None:
+        # shutdown() waits for serve_forever, which runs in this very thread
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGQUIT, signal.SIG_DFL)
+    try:
+        server.serve_forever(poll_interval=0.5)
+        # once every process has closed it, new connections are refused
+        listener.close()
+        server.drain()
+    finally:
+        for project_type in app.extensions.get("project_types", {}).values():
+            project_type.close()
+
+
+class PreforkServer:
+    """Master process: binds the socket, preloads the app, then forks and supervises workers.
+
+    Only the fallback of ``serve`` when gunicorn is not installed. It is
+    built on ``wsgiref``, speaks HTTP/1.0 and closes every connection
+    after one response (no keep-alive, no chunked encoding), so it must
+    run behind a reverse proxy.
+
+    ``SIGTERM``/``SIGINT`` stop gracefully: workers stop accepting, finish
+    their requests and exit, and are killed after ``graceful_timeout``.
+    ``SIGQUIT`` stops at once. A worker that dies is replaced.
+    """
+
+    def __init__(
+        self,
+        app: Flask,
+        host: str = "0.0.0.0",
+        port: int = 5000,
+        workers: Optional[int] = None,
+        threads: int = DEFAULT_THREADS,
+        timeout: float = DEFAULT_TIMEOUT,
+        graceful_timeout: float = DEFAULT_GRACEFUL_TIMEOUT,
+        preload: bool = True,
+        backlog: int = DEFAULT_BACKLOG,
+    ) -> None:
+        self.app = app
+        self.address = (host, port)
+        self.worker_count = max(1, workers or os.cpu_count() or 1)
+        self.threads = max(1, threads)
+        self.timeout = timeout
+        self.graceful_timeout = graceful_timeout
+        self.preload = preload
+        self.backlog = backlog
+        self.workers: Dict[int, float] = {}
+        self._stopping: Optional[int] = None
+
+    def _bind(self) -> socket.socket:
+        family = socket.AF_INET6 if ":" in self.address[0] else socket.AF_INET
+        listener = socket.socket(family, socket.SOCK_STREAM)
+        listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        listener.bind(self.address)
+        listener.listen(self.backlog)
+        listener.setblocking(False)
+        return listener
+
+    def _spawn(self, listener: socket.socket) -> None:
+        pid = os.fork()
+        if pid:
+            self.workers[pid] = time.monotonic()
+            return
+        exit_code = 0
+        try:
+            _worker_main(self.app, listener, self.threads, self.timeout)
+        except BaseException as exc:  # pragma: no cover - defensive logging only
+            print(f"Worker {os.getpid()} failed: {exc!r}")
+            exit_code = 1
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            # never fall back into the master's code (or its atexit handlers)
+            os._exit(exit_code)
+
+    def _reap(self) -> None:
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            started = self.workers.pop(pid, None)
+            if started is not None and self._stopping is None:
+                print(f"Worker {pid} exited (status {status}), replacing it")
+                if time.monotonic() - started < RESPAWN_DELAY:
+                    time.sleep(RESPAWN_DELAY)
+
+    def _signal(self, signum: int) -> None:
+        for pid in list(self.workers):
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                self.workers.pop(pid, None)
+
+    def _request_stop(self, signum, frame) -> None:
+        self._stopping = signum
+
+    def run(self) -> None:
+        if not hasattr(os, "fork"):
+            raise RuntimeError("the preforking server needs a POSIX system (os.fork)")
+
+        listener = self._bind()
+        if self.preload:
+            preload_app(self.app)
+        # objects that survived startup stay out of the collector's sweeps,
+        # which would otherwise touch (and copy) their pages in every worker
+        gc.freeze()
+
+        for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGQUIT):
+            signal.signal(signum, self._request_stop)
+        host, port = listener.getsockname()[:2]
+        print(f"Serving on http://{host}:{port} ({self.worker_count} workers x {self.threads} threads)")
+
+        while self._stopping is None:
+            self._reap()
+            while len(self.workers) < self.worker_count and self._stopping is None:
+                self._spawn(listener)
+            time.sleep(0.2)
+
+        listener.close()
+        if self._stopping == signal.SIGQUIT:
+            self._signal(signal.SIGKILL)
+        else:
+            self._signal(signal.SIGTERM)
+            deadline = time.monotonic() + self.graceful_timeout
+            while self.workers and time.monotonic() < deadline:
+                self._reap()
+                time.sleep(0.1)
+            self._signal(signal.SIGKILL)
+        while self.workers:
+            self._reap()
+            time.sleep(0.05)
+        for project_type in self.app.extensions.get("project_types", {}).values():
+            project_type.close()
+
+
+def serve(
+    app: Flask,
+    host: str = "0.0.0.0",
+    port: int = 5000,
+    workers: Optional[int] = None,
+    threads: int = DEFAULT_THREADS,
+    timeout: float = DEFAULT_TIMEOUT,
+    graceful_timeout: float = DEFAULT_GRACEFUL_TIMEOUT,
+    preload: bool = True,
+    backlog: int = DEFAULT_BACKLOG,
+) -> None:
+    """Run ``app`` under gunicorn, or under ``PreforkServer`` when gunicorn is not installed."""
+    if importlib.util.find_spec("gunicorn") is None:
+        print(
+            "WARNING: gunicorn is not installed (pip install gunicorn). Falling back to the "
+            "built-in server: HTTP/1.0, no keep-alive. Only run it behind a reverse proxy."
+        )
+        PreforkServer(
+            app, host, port, workers=workers, threads=threads, timeout=timeout,
+            graceful_timeout=graceful_timeout, preload=preload, backlog=backlog,
+        ).run()
+        return
+
+    from .gunicorn_server import GunicornServer
+
+    GunicornServer(
+        app,
+        {
+            "bind": f"[{host}]:{port}" if ":" in host else f"{host}:{port}",
+            "workers": max(1, workers or os.cpu_count() or 1),
+            "threads": max(1, threads),
+            # gunicorn counts whole seconds
+            "timeout": math.ceil(timeout),
+            "graceful_timeout": math.ceil(graceful_timeout),
+            "backlog": backlog,
+        },
+        preload=preload,
+    ).run()
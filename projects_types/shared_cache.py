@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from importlib import import_module
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from flask import Flask
+
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# backends by name; ``backend`` may also be a ``module:Class`` import path
+SHARED_CACHE_BACKENDS: Dict[str, str] = {
+    "sqlite": "projects_types.shared_cache:SqliteSharedCache",
+}
+# the size limit is checked every this many writes
+_EVICTION_INTERVAL = 64
+# reads refresh an entry's last use at most this often (seconds)
+_TOUCH_INTERVAL = 60.0
+
+
+def content_key(*parts: Any) -> str:
+    """Hash of everything a cached value was derived from (bytes or text)."""
+    digest = hashlib.sha256()
+    for part in parts:
+        data = part if isinstance(part, bytes) else str(part).encode("utf-8")
+        digest.update(len(data).to_bytes(8, "little"))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+class SharedCache:
+    """Cache shared by every worker process of a node; this base class stores nothing.
+
+    Values are bytes grouped by namespace. Backends must be safe to use
+    from several threads and from processes forked after they were created.
+    """
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return type(self) is not SharedCache
+
+    def get(self, namespace: str, key: str) -> Optional[bytes]:
+        return None
+
+    def put(self, namespace: str, key: str, value: bytes) -> None:
+        pass
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+    def close(self) -> None:
+        pass
+
+
+class SqliteSharedCache(SharedCache):
+    """``SharedCache`` in an SQLite file (WAL), evicting least recently used entries.
+
+    Every process and thread opens its own connection on first use, so the
+    cache can be created before ``flask serve`` forks. Entries outlive the
+    processes: a restarted worker starts with whatever the node rendered.
+    """
+
+    def __init__(self, path: Path, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        super().__init__()
+        self.path = Path(path)
+        self.max_bytes = int(max_bytes)
+        self._local = threading.local()
+        self._writes = 0
+        self._lock = threading.Lock()
+        # (pid, connection) of every thread, so close() reaches them all
+        self._connections: List[Tuple[int, sqlite3.Connection]] = []
+        self._generation = 0
+
+    @property
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if (
+            connection is None
+            or self._local.pid != os.getpid()
+            or self._local.generation != self._generation
+        ):
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # closed by whichever thread calls close()
+            connection = sqlite3.connect(
+                str(self.path), timeout=5, isolation_level=None, check_same_thread=False
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS entries (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    used REAL NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                ) WITHOUT ROWID;
+                CREATE INDEX IF NOT EXISTS entries_used ON entries (used);
+                """
+            )
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+            self._local.generation = self._generation
+            with self._lock:
+                self._connections.append((os.getpid(), connection))
+        return connection
+
+    def get(self, namespace: str, key: str) -> Optional[bytes]:
+        try:
+            row = self._connection.execute(
+                "SELECT value, used FROM entries WHERE namespace = ? AND key = ?",
+                (namespace, key),
+            ).fetchone()
+            if row is not None and time.time() - row[1] > _TOUCH_INTERVAL:
+                self._connection.execute(
+                    "UPDATE entries SET used = ? WHERE namespace = ? AND key = ?",
+                    (time.time(), namespace, key),
+                )
+        except sqlite3.Error as exc:  # pragma: no cover - defensive logging only
+            print(f"Error reading {self.path}: {exc}")
+            row = None
+
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return row[0]
+
+    def put(self, namespace: str, key: str, value: bytes) -> None:
+        if len(value) > self.max_bytes:
+            return
+        try:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO entries (namespace, key, value, size, used) VALUES (?, ?, ?, ?, ?)",
+                (namespace, key, value, len(value), time.time()),
+            )
+        except sqlite3.Error as exc:  # pragma: no cover - defensive logging only
+            print(f"Error writing {self.path}: {exc}")
+            return
+
+        with self._lock:
+            self._writes += 1
+            due = self._writes % _EVICTION_INTERVAL == 0
+        if due:
+            self.evict()
+
+    def evict(self) -> int:
+        """Drop the least recently used entries above ``max_bytes``; returns how many."""
+        try:
+            connection = self._connection
+            total = connection.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            if total <= self.max_bytes:
+                return 0
+            # go below the limit with some margin, not one entry per write
+            excess = total - int(self.max_bytes * 0.9)
+            doomed = []
+            for namespace, key, size in connection.execute(
+                "SELECT namespace, key, size FROM entries ORDER BY used"
+            ):
+                doomed.append((namespace, key))
+                excess -= size
+                if excess <= 0:
+                    break
+            connection.executemany("DELETE FROM entries WHERE namespace = ? AND key = ?", doomed)
+            return len(doomed)
+        except sqlite3.Error as exc:  # pragma: no cover - defensive logging only
+            print(f"Error evicting from {self.path}: {exc}")
+            return 0
+
+    def close(self) -> None:
+        """Close the connections every thread of this process opened."""
+        pid = os.getpid()
+        with self._lock:
+            # a forked child leaves its parent's connections alone
+            connections = [connection for owner, connection in self._connections if owner == pid]
+            self._connections = []
+            self._generation += 1
+        for connection in connections:
+            try:
+                connection.close()
+            except sqlite3.Error as exc:  # pragma: no cover - defensive logging only
+                print(f"Error closing {self.path}: {exc}")
+
+
+def create_shared_cache(app: Flask, identifier: str, config: Optional[Dict[str, Any]]) -> SharedCache:
+    """Build the backend named by a type's ``shared_cache`` section (none when it has no section)."""
+    if not config or not config.get("backend") or config["backend"] == "none":
+        return SharedCache()
+
+    backend = config["backend"]
+    implementation_path = SHARED_CACHE_BACKENDS.get(backend, backend)
+    module_name, _, class_name = implementation_path.partition(":")
+    backend_class = getattr(import_module(module_name), class_name)
+    if backend_class is SqliteSharedCache:
+        path = config.get("path") or Path(app.instance_path) / "cache" / f"{identifier}.sqlite3"
+        return SqliteSharedCache(Path(path), config.get("max_bytes", DEFAULT_MAX_BYTES))
+    return backend_class(**{key: value for key, value in config.items() if key != "backend"})
@@ -0,0 +1,247 @@
+from __future__ import annotations
+
+import gzip
+import mimetypes
+import os
+import re
+import stat
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from flask import Response, request
+from werkzeug.security import safe_join
+
+from .file_delivery import FileDelivery
+
+try:  # brotli is optional: without it only gzip variants are produced
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+
+ENCODING_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+DEFAULT_MIN_SIZE = 1024
+DEFAULT_IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/javascript",
+    "application/json",
+    "application/manifest+json",
+    "application/wasm",
+    "application/xml",
+    "image/svg+xml",
+    "font/ttf",
+    "font/otf",
+)
+# name.3f9a1c2e.js, name-3f9a1c2e.css, name.3f9a1c2e.min.js: content-addressed files.
+# The hash needs a letter (or 16+ digits) so dated names like report-20231231.csv
+# are not cached for a year.
+_FINGERPRINT_PATTERN = re.compile(
+    r"[.-](?:(?=[0-9]*[a-fA-F])[0-9a-fA-F]{8,}|[0-9]{16,})(\.min)?\.[A-Za-z0-9]+$"
+)
+
+
+def is_fingerprinted(filename: str) -> bool:
+    return bool(_FINGERPRINT_PATTERN.search(filename))
+
+
+def is_compressible(mimetype: Optional[str]) -> bool:
+    return bool(mimetype) and mimetype.startswith(COMPRESSIBLE_TYPES)
+
+
+def _compress(data: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=11)
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+class StaticFile(NamedTuple):
+    path: Path
+    mtime_ns: int
+    size: int
+    mimetype: str
+
+
+class _Variant(NamedTuple):
+    signature: Tuple[int, int]
+    path: Optional[Path]
+    size: int
+
+
+class StaticAssetCache:
+    """Serves project files with precompressed gzip/brotli variants.
+
+    Variants live under ``cache_dir`` mirroring the project tree, stamped
+    with the source's mtime so one ``stat`` tells whether they are current.
+    A ``.gz``/``.br`` file shipped next to the original (by a front-end
+    build) is used as-is when it is at least as recent as the source.
+    Variants are built on first request, or all at once by ``precompress``.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        encodings: Iterable[str] = ("br", "gzip"),
+        min_size: int = DEFAULT_MIN_SIZE,
+        immutable_max_age: int = DEFAULT_IMMUTABLE_MAX_AGE,
+        enabled: bool = True,
+        delivery: Optional[FileDelivery] = None,
+    ) -> None:
+        self.cache_dir = cache_dir
+        self.delivery = delivery or FileDelivery()
+        self.encodings: List[str] = [
+            encoding
+            for encoding in encodings
+            if encoding in ENCODING_SUFFIXES and (encoding != "br" or brotli is not None)
+        ]
+        self.min_size = int(min_size)
+        self.immutable_max_age = int(immutable_max_age)
+        self.enabled = bool(enabled) and bool(self.encodings)
+        self._variants: Dict[Tuple[Path, str], _Variant] = {}
+        self._real_roots: Dict[Path, str] = {}
+        self._lock = threading.Lock()
+
+    def lookup(self, root: Path, relative_path: str) -> Optional[StaticFile]:
+        """Find ``relative_path`` under ``root``; ``None`` unless it is a regular file inside it."""
+        joined = safe_join(str(root), relative_path)
+        if joined is None:
+            return None
+        path = Path(joined)
+        try:
+            stat_result = path.stat()
+        except (OSError, ValueError):
+            return None
+        if not stat.S_ISREG(stat_result.st_mode):
+            return None
+        # symlinks must not lead out of the project (the only path resolution per request)
+        if not os.path.realpath(joined).startswith(self._real_root(root)):
+            return None
+        mimetype = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+        return StaticFile(path, stat_result.st_mtime_ns, stat_result.st_size, mimetype)
+
+    def _real_root(self, root: Path) -> str:
+        real_root = self._real_roots.get(root)
+        if real_root is None:
+            real_root = os.path.join(os.path.realpath(root), "")
+            self._real_roots[root] = real_root
+        return real_root
+
+    def _cache_path(self, key: str, encoding: str) -> Path:
+        return self.cache_dir / f"{key}{ENCODING_SUFFIXES[encoding]}"
+
+    def variant(self, static_file: StaticFile, key: str, encoding: str) -> Optional[_Variant]:
+        """Return the compressed variant of ``static_file``, building it when missing."""
+        signature = (static_file.mtime_ns, static_file.size)
+        memo_key = (static_file.path, encoding)
+        cached = self._variants.get(memo_key)
+        if cached and cached.signature == signature:
+            return cached if cached.path else None
+
+        # a variant produced by the project's own build, next to the original
+        shipped = static_file.path.with_name(static_file.path.name + ENCODING_SUFFIXES[encoding])
+        try:
+            shipped_stat = shipped.stat()
+        except OSError:
+            shipped_stat = None
+        if shipped_stat and shipped_stat.st_mtime_ns >= static_file.mtime_ns:
+            found = _Variant(signature, shipped, shipped_stat.st_size)
+        else:
+            found = self._cached_variant(static_file, key, encoding, signature)
+
+        # a variant that saves nothing is remembered as absent
+        if found.path and found.size >= static_file.size:
+            found = _Variant(signature, None, 0)
+        with self._lock:
+            self._variants[memo_key] = found
+        return found if found.path else None
+
+    def _cached_variant(
+        self, static_file: StaticFile, key: str, encoding: str, signature: Tuple[int, int]
+    ) -> _Variant:
+        target = self._cache_path(key, encoding)
+        try:
+            target_stat = target.stat()
+        except OSError:
+            target_stat = None
+        if target_stat and target_stat.st_mtime_ns == static_file.mtime_ns:
+            return _Variant(signature, target, target_stat.st_size)
+
+        try:
+            data = _compress(static_file.path.read_bytes(), encoding)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            temporary = target.with_name(f".{target.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            temporary.write_bytes(data)
+            os.utime(temporary, ns=(static_file.mtime_ns, static_file.mtime_ns))
+            os.replace(temporary, target)
+        except OSError as exc:  # pragma: no cover - defensive logging only
+            print(f"Error compressing {static_file.path}: {exc}")
+            return _Variant(signature, None, 0)
+        return _Variant(signature, target, len(data))
+
+    def precompress(self, root: Path, key_prefix: str) -> int:
+        """Build every missing variant under ``root``; returns how many files were visited."""
+        if not self.enabled:
+            return 0
+        visited = 0
+        for directory, folders, filenames in os.walk(root):
+            folders[:] = [folder for folder in folders if not folder.startswith(".")]
+            for filename in filenames:
+                if filename.startswith(".") or filename.endswith((".gz", ".br")):
+                    continue
+                relative_path = Path(directory, filename).relative_to(root).as_posix()
+                static_file = self.lookup(root, relative_path)
+                if static_file is None or not self._wants_compression(static_file):
+                    continue
+                visited += 1
+                for encoding in self.encodings:
+                    self.variant(static_file, f"{key_prefix}/{relative_path}", encoding)
+        return visited
+
+    def _wants_compression(self, static_file: StaticFile) -> bool:
+        return (
+            self.enabled
+            and static_file.size >= self.min_size
+            and is_compressible(static_file.mimetype)
+        )
+
+    def _negotiate(self) -> List[str]:
+        accepted = request.accept_encodings
+        return [encoding for encoding in self.encodings if accepted[encoding] > 0]
+
+    def send(self, static_file: StaticFile, key: str) -> Response:
+        """Send ``static_file`` (or its best compressed variant) with validators."""
+        path, size, encoding = static_file.path, static_file.size, None
+        if self._wants_compression(static_file):
+            for candidate in self._negotiate():
+                found = self.variant(static_file, key, candidate)
+                if found is not None:
+                    path, size, encoding = found.path, found.size, candidate
+                    break
+
+        # one strong ETag per representation, derived from the source
+        etag = f"{static_file.mtime_ns:x}-{static_file.size:x}"
+        if encoding:
+            etag += f"-{encoding}"
+
+        # compressed variants stay in-process: proxies may drop Content-Encoding
+        response = self.delivery.send(
+            path,
+            size,
+            static_file.mimetype,
+            etag,
+            static_file.mtime_ns,
+            offload=encoding is None,
+        )
+        if encoding:
+            response.headers["Content-Encoding"] = encoding
+        if self._wants_compression(static_file):
+            response.vary.add("Accept-Encoding")
+
+        if is_fingerprinted(static_file.path.name):
+            response.cache_control.public = True
+            response.cache_control.max_age = self.immutable_max_age
+            response.cache_control.immutable = True
+        else:
+            response.cache_control.no_cache = True
+        return response
@@ -1,17 +1,46 @@
 from __future__ import annotations
 
+import os
 from pathlib import Path
 from typing import Any, Dict, List
 
-from flask import abort, render_template, send_from_directory
+from flask import abort, url_for
 
 from .base import ProjectType
+from .file_delivery import FileDelivery
+from .static_assets import DEFAULT_IMMUTABLE_MAX_AGE, DEFAULT_MIN_SIZE, StaticAssetCache
 
 
 class StaticProjectType(ProjectType):
     type_name = "static"
 
-    def list_projects(self) -> List[Dict[str, Any]]:
+    def __init__(self, app, raw_config: Dict[str, Any]) -> None:
+        super().__init__(app, raw_config)
+        compression_config = raw_config.get("compression", {})
+        self.precompress_assets = compression_config.get("precompress", False)
+        delivery_config = raw_config.get("delivery", {})
+        self.assets = StaticAssetCache(
+            Path(
+                compression_config.get("cache_dir")
+                or Path(app.instance_path) / "static-cache" / self.identifier
+            ),
+            encodings=compression_config.get("encodings", ["br", "gzip"]),
+            min_size=compression_config.get("min_size", DEFAULT_MIN_SIZE),
+            immutable_max_age=raw_config.get("cache", {}).get(
+                "immutable_max_age", DEFAULT_IMMUTABLE_MAX_AGE
+            ),
+            enabled=compression_config.get("enabled", True),
+            delivery=FileDelivery(
+                delivery_config.get("mode", "wsgi"),
+                {
+                    self.projects_dir: delivery_config.get(
+                        "internal_prefix", f"/_internal/{self.identifier}/"
+                    ),
+                },
+            ),
+        )
+
+    def scan_projects(self) -> List[Dict[str, Any]]:
         if not self.projects_root_exists():
             return []
 
@@ -21,71 +50,75 @@ class StaticProjectType(ProjectType):
                 # Check if the directory contains an index.html file
                 index_file = directory / "index.html"
                 if index_file.is_file():
-                    project_id = directory.name
-                    projects.append(
-                        {
-                            "id": project_id,
-                            "name": self.get_project_display_name(project_id),
-                            "emoji": self.get_project_emoji(project_id),
-                        }
-                    )
+                    projects.append(self.describe_project(directory.name))
         return projects
 
-    def register_routes(self) -> None:
-        app = self.app
+    def export_paths(self) -> List[str]:
+        paths = [url_for("static_list")]
+        for project in self.list_projects():
+            project_name = project["id"]
+            project_directory = self.projects_dir / project_name
+            paths.append(url_for("static_project", project_name=project_name))
+            for directory, folders, filenames in os.walk(project_directory):
+                folders[:] = sorted(folder for folder in folders if not folder.startswith("."))
+                for filename in sorted(filenames):
+                    if filename.startswith("."):
+                        continue
+                    relative_path = Path(directory, filename).relative_to(project_directory)
+                    paths.append(
+                        url_for(
+                            "static_file",
+                            project_name=project_name,
+                            filepath=relative_path.as_posix(),
+                        )
+                    )
+        return paths
 
-        app.add_url_rule(
+    def register_routes(self) -> None:
+        self.add_url_rule(
             "/static-projects",
             endpoint="static_list",
             view_func=self._static_list_view,
         )
 
-        app.add_url_rule(
+        self.add_url_rule(
             "/static-projects/<project_name>/",
             endpoint="static_project",
             view_func=self._static_project_view,
         )
 
-        app.add_url_rule(
+        self.add_url_rule(
             "/static-projects/<project_name>/<path:filepath>",
             endpoint="static_file",
             view_func=self._static_file_view,
         )
 
-    def _static_list_view(self):
-        projects = self.list_projects()
-        return render_template("static_list.html", projects=projects)
+        if self.precompress_assets:
+            self.precompress_projects()
 
-    def _static_project_view(self, project_name: str):
-        if not self._project_exists(project_name):
-            abort(404)
+    def _static_list_view(self):
+        return self.render_project_list("static_list.html")
 
-        # Serve the index.html file
-        project_directory = self.projects_dir / project_name
-        index_file = project_directory / "index.html"
-        
-        if not index_file.is_file():
-            abort(404)
+    def precompress_projects(self) -> None:
+        """Build the compressed variants of every project up front instead of on first hit."""
+        for project in self.list_projects():
+            self.assets.precompress(self.projects_dir / project["id"], project["id"])
 
-        return send_from_directory(project_directory, "index.html")
+    def _static_project_view(self, project_name: str):
+        return self._static_file_view(project_name, "index.html")
 
     def _static_file_view(self, project_name: str, filepath: str):
         if not self._project_exists(project_name):
             abort(404)
 
-        project_directory = self.projects_dir / project_name
-        file_path = project_directory / filepath
-
-        # Security check: ensure the file is within the project directory
-        try:
-            file_path.resolve().relative_to(project_directory.resolve())
-        except ValueError:
-            abort(404)
-
-        if not file_path.is_file():
+        # one join + stat, the path is checked to stay inside the project
+        static_file = self.assets.lookup(self.projects_dir / project_name, filepath)
+        if static_file is None:
             abort(404)
 
-        return send_from_directory(project_directory, filepath)
+        # includes building a compressed variant on its first request
+        with self.timed("send", project_name):
+            return self.assets.send(static_file, f"{project_name}/{filepath}")
 
     def _project_exists(self, project_name: str) -> bool:
         project_directory = self.projects_dir / project_name
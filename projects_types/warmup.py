@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+from flask import Flask
+
+from .batches import run_batches, worker_app
+
+
+# (type identifier, source path)
+WarmItem = Tuple[str, str]
+# (type identifier, source path, outcome): "computed", "stored" or an error message
+WarmResult = Tuple[str, str, str]
+
+
+class WarmReport(NamedTuple):
+    computed: List[str]
+    stored: List[str]
+    failed: List[Tuple[str, str]]
+
+
+def _warm_batch(items: List[WarmItem]) -> List[WarmResult]:
+    app = worker_app()
+    project_types = app.extensions.get("project_types", {})
+    results: List[WarmResult] = []
+    with app.app_context():
+        for identifier, path in items:
+            try:
+                computed = project_types[identifier].warm(Path(path))
+            except Exception as exc:  # pragma: no cover - defensive logging only
+                print(f"Error warming {path}: {exc}")
+                results.append((identifier, path, str(exc) or type(exc).__name__))
+                continue
+            results.append((identifier, path, "computed" if computed else "stored"))
+    return results
+
+
+def warm_shared_caches(
+    app: Flask,
+    app_import: str,
+    jobs: Optional[int] = None,
+    identifiers: Iterable[str] = (),
+) -> WarmReport:
+    """Render every source of the types with a shared cache into it.
+
+    Sources already in the cache (same content and extension setup) are
+    only looked up, so running it again after a deploy converts just the
+    pages that changed. Work is split across ``jobs`` processes, each of
+    which imports ``app_import`` once.
+    """
+    wanted = set(identifiers)
+    items: List[WarmItem] = []
+    with app.app_context():
+        for identifier, project_type in app.extensions.get("project_types", {}).items():
+            if wanted and identifier not in wanted:
+                continue
+            if not project_type.shared_cache.enabled:
+                continue
+            items.extend((identifier, str(path)) for path in project_type.warm_sources())
+
+    results: List[WarmResult] = run_batches(app, app_import, _warm_batch, items, jobs)
+
+    report = WarmReport([], [], [])
+    for _, path, outcome in sorted(results):
+        if outcome == "computed":
+            report.computed.append(path)
+        elif outcome == "stored":
+            report.stored.append(path)
+        else:
+            report.failed.append((path, outcome))
+    return report
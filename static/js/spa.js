@@ -15,14 +15,76 @@ class SPA {
     }
 
     detectCurrentProject() {
-        // detect projet md actuel via url
-        const match = window.location.pathname.match(/^\/md\/([^\/]+)/);
-        if (match) {
-            this.currentProject = match[1];
+        // detect projet md/notion actuel via url
+        const project = this.projectFromUrl(window.location.pathname);
+        if (project) {
+            this.currentProject = project;
             this.saveSidebarState();
         }
     }
 
+    projectFromUrl(url) {
+        const path = new URL(url, window.location.origin).pathname;
+        const match = path.match(/^\/(md|notion)\/([^\/]+)/);
+        return match ? `${match[1]}/${match[2]}` : null;
+    }
+
+    async fetchPage(url, fragment) {
+        // fragment: le serveur renvoie seulement titre, breadcrumb et contenu (json)
+        const headers = { 'X-Requested-With': 'XMLHttpRequest' };
+        if (fragment) {
+            headers['Accept'] = 'application/json';
+        }
+
+        const response = await fetch(url, { headers, redirect: 'follow' });
+        if (!response.ok) {
+            throw new Error(`http error ${response.status}`);
+        }
+
+        // url final après redirections (ex: /notion/projet -> sa page par défaut)
+        const finalUrl = response.url || url;
+        const contentType = response.headers.get('content-type') || '';
+        if (contentType.includes('application/json')) {
+            return { fragment: await response.json(), url: finalUrl };
+        }
+        if (contentType.includes('text/html')) {
+            return { html: await response.text(), url: finalUrl };
+        }
+        return null;
+    }
+
+    updateContentFromFragment(fragment) {
+        const container = document.querySelector('.main-content');
+        if (!container) return;
+
+        const currentMdContent = container.querySelector('.md-content');
+        const currentBreadcrumb = container.querySelector('.breadcrumb');
+        if (currentMdContent) currentMdContent.innerHTML = fragment.page_content;
+        if (currentBreadcrumb) currentBreadcrumb.innerHTML = fragment.breadcrumb;
+        document.title = fragment.title;
+
+        // update active file dans sidebar
+        const sidebar = container.querySelector('.md-sidebar');
+        if (!sidebar) return;
+
+        const pathname = new URL(fragment.url, window.location.origin).pathname;
+        sidebar.querySelectorAll('.file-item').forEach(item => {
+            const link = item.querySelector('.file-link');
+            const active = Boolean(link && link.getAttribute('href') === pathname);
+            item.classList.toggle('active', active);
+            const icon = item.querySelector('.file-icon');
+            if (!icon) return;
+            if (active) {
+                icon.textContent = '▶';
+            } else if (icon.textContent.trim() === '▶') {
+                // icône propre au fichier (📝 page, 📊 base de données)
+                icon.textContent = icon.dataset.icon || '📝';
+            }
+        });
+
+        this.restoreSidebarState();
+    }
+
     saveSidebarState() {
         const sidebar = document.querySelector('.md-sidebar');
         if (!sidebar) return;
@@ -179,8 +241,8 @@ class SPA {
                 sidebar.querySelectorAll('.file-item').forEach(item => {
                     item.classList.remove('active');
                     const icon = item.querySelector('.file-icon');
-                    if (icon && icon.textContent === '▶') {
-                        icon.textContent = '📝';
+                    if (icon && icon.textContent.trim() === '▶') {
+                        icon.textContent = icon.dataset.icon || '📝';
                     }
                 });
 
@@ -415,26 +477,29 @@ class SPA {
     setupPrefetch() {
         document.body.addEventListener('mouseenter', (e) => {
             const link = e.target.closest('a[data-spa]');
-            if (link && link.href && !this.prefetchCache.has(link.href)) {
+            if (link && link.href) {
                 this.prefetchPage(link.href);
             }
         }, true);
     }
 
+    prefetchKey(url, fragment) {
+        const absolute = new URL(url, window.location.origin).href;
+        return `${fragment ? 'fragment' : 'page'}:${absolute}`;
+    }
+
     async prefetchPage(url) {
+        const newProject = this.projectFromUrl(url);
+        const fragment = Boolean(this.currentProject && newProject === this.currentProject);
+        const cacheKey = this.prefetchKey(url, fragment);
+
         // éviter prefetch si déjà en cache
-        if (this.prefetchCache.has(url)) return;
+        if (this.prefetchCache.has(cacheKey)) return;
 
         try {
-            const response = await fetch(url, {
-                headers: {
-                    'X-Requested-With': 'XMLHttpRequest'
-                }
-            });
-
-            if (response.ok) {
-                const html = await response.text();
-                this.prefetchCache.set(url, html);
+            const page = await this.fetchPage(url, fragment);
+            if (page) {
+                this.prefetchCache.set(cacheKey, page);
                 
                 // limit cache size
                 if (this.prefetchCache.size > 10) {
@@ -451,9 +516,9 @@ class SPA {
         const container = document.querySelector('.main-content');
         if (!container) return;
 
-        // detect si on reste dans même projet md
+        // detect si on reste dans même projet md/notion
         const oldProject = this.currentProject;
-        const newProject = url.match(/^\/md\/([^\/]+)/)?.[1];
+        const newProject = this.projectFromUrl(url);
         const sameProject = oldProject && newProject && oldProject === newProject;
 
         // save sidebar state si dans même projet
@@ -469,48 +534,43 @@ class SPA {
         await new Promise(resolve => setTimeout(resolve, 200));
 
         try {
-            let html;
+            const cacheKey = this.prefetchKey(url, sameProject);
+            let page;
             // check cache
-            if (this.prefetchCache.has(url)) {
-                html = this.prefetchCache.get(url);
-                this.prefetchCache.delete(url);
+            if (this.prefetchCache.has(cacheKey)) {
+                page = this.prefetchCache.get(cacheKey);
+                this.prefetchCache.delete(cacheKey);
             } else {
-                const response = await fetch(url, {
-                    headers: {
-                        'X-Requested-With': 'XMLHttpRequest'
-                    },
-                    redirect: 'follow'
-                });
-
-                if (!response.ok) {
-                    throw new Error(`http error ${response.status}`);
-                }
-
-                const contentType = response.headers.get('content-type') || '';
-                if (!contentType.includes('text/html')) {
+                page = await this.fetchPage(url, sameProject);
+                if (!page) {
                     window.location.href = url;
                     return;
                 }
-
-                html = await response.text();
             }
 
-            const parser = new DOMParser();
-            const doc = parser.parseFromString(html, 'text/html');
+            // url réellement servie, en gardant l'ancre demandée
+            const finalUrl = new URL(page.url || url, window.location.origin);
+            finalUrl.hash = new URL(url, window.location.origin).hash;
 
-            this.updateContentFromDocument(doc, sameProject);
+            if (page.fragment) {
+                this.updateContentFromFragment({ ...page.fragment, url: finalUrl.href });
+            } else {
+                const parser = new DOMParser();
+                const doc = parser.parseFromString(page.html, 'text/html');
+
+                this.updateContentFromDocument(doc, sameProject);
+
+                const newTitle = doc.querySelector('title');
+                if (newTitle) {
+                    document.title = newTitle.textContent;
+                }
+            }
 
-            const finalUrl = new URL(url, window.location.origin);
             if (pushState) {
                 const relativeUrl = `${finalUrl.pathname}${finalUrl.search}${finalUrl.hash}`;
                 window.history.pushState({}, '', relativeUrl);
             }
 
-            const newTitle = doc.querySelector('title');
-            if (newTitle) {
-                document.title = newTitle.textContent;
-            }
-
             // update current project
             this.currentProject = newProject;
 
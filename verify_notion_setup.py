@@ -97,9 +97,9 @@ def test_notion_type_functionality():
 def test_app_integration():
     """Test that the app loads with Notion type."""
     try:
-        from app import app, project_types
+        from app import app
         
-        if 'notion' in project_types:
+        if 'notion' in app.extensions['project_types']:
             print("✓ Notion type loaded in application")
             return True
         else:
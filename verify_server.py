@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Verification script for the production server (``flask serve``).
+Starts it on a temporary static project and checks that a large file is
+delivered completely, to a slow client and as a byte range.
+"""
+
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import yaml
+
+REPO_ROOT = Path(__file__).resolve().parent
+PORT = 5199
+FILE_SIZE = 32 * 1024 * 1024
+URL_PATH = "/static-projects/verify/large.bin"
+
+
+def _download(headers=""):
+    """Fetch ``URL_PATH`` over HTTP/1.0; returns (status line, body)."""
+    connection = socket.create_connection(("127.0.0.1", PORT), timeout=30)
+    # small buffers and a slow start fill the server's send buffer
+    connection.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 64 * 1024)
+    connection.sendall(f"GET {URL_PATH} HTTP/1.0\r\nHost: localhost\r\n{headers}\r\n".encode("ascii"))
+    data = bytearray()
+    with connection:
+        while True:
+            chunk = connection.recv(1024 * 1024)
+            if not chunk:
+                break
+            data += chunk
+            if len(data) < 4 * 1024 * 1024:
+                time.sleep(0.01)
+    head, _, body = bytes(data).partition(b"\r\n\r\n")
+    return head.split(b"\r\n", 1)[0].decode("latin-1"), body
+
+
+def test_full_download(content):
+    """Test that a slow client receives the whole file."""
+    try:
+        status, body = _download()
+        if status.split()[1:2] == ["200"] and body == content:
+            print(f"✓ {len(body)} bytes received intact")
+            return True
+        print(f"✗ {status}: {len(body)} of {len(content)} bytes received")
+        return False
+    except Exception as e:
+        print(f"✗ Download failed: {e}")
+        return False
+
+
+def test_range_download(content):
+    """Test that an open-ended byte range is sent from its offset to the end."""
+    start = len(content) // 3
+    try:
+        status, body = _download(f"Range: bytes={start}-\r\n")
+        if status.split()[1:2] == ["206"] and body == content[start:]:
+            print(f"✓ {len(body)} bytes received from offset {start}")
+            return True
+        print(f"✗ {status}: {len(body)} of {len(content) - start} bytes received")
+        return False
+    except Exception as e:
+        print(f"✗ Range download failed: {e}")
+        return False
+
+
+def main():
+    """Run all tests."""
+    print("=" * 60)
+    print("Production Server Verification")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as root:
+        root = Path(root)
+        project = root / "projects" / "static" / "verify"
+        project.mkdir(parents=True)
+        (project / "index.html").write_text("<p>verify</p>", encoding="utf-8")
+        content = os.urandom(FILE_SIZE)
+        (project / "large.bin").write_bytes(content)
+
+        config = yaml.safe_load((REPO_ROOT / "projects_types_configs" / "static.yaml").read_text(encoding="utf-8"))
+        config["projects_dir"] = str(root / "projects" / "static")
+        config.setdefault("compression", {})["cache_dir"] = str(root / "static-cache")
+        (root / "configs").mkdir()
+        (root / "configs" / "static.yaml").write_text(yaml.safe_dump(config, allow_unicode=True), encoding="utf-8")
+
+        env = dict(os.environ, FLASK_PROJECT_TYPE_CONFIGS_DIR=str(root / "configs"))
+        # one worker and a short idle timeout: the conditions truncated downloads appeared in
+        server = subprocess.Popen(
+            [sys.executable, "-m", "flask", "--app", "app", "serve", "--port", str(PORT),
+             "--workers", "1", "--threads", "2", "--timeout", "2"],
+            cwd=REPO_ROOT, env=env,
+        )
+        try:
+            for _ in range(100):
+                try:
+                    socket.create_connection(("127.0.0.1", PORT), timeout=1).close()
+                    break
+                except OSError:
+                    time.sleep(0.1)
+
+            tests = [
+                ("Full Download", test_full_download),
+                ("Range Download", test_range_download),
+            ]
+            results = []
+            for name, test_func in tests:
+                print(f"\nTesting {name}...")
+                results.append(test_func(content))
+        finally:
+            server.send_signal(signal.SIGTERM)
+            server.wait(timeout=60)
+
+    print("\n" + "=" * 60)
+    passed = sum(results)
+    total = len(results)
+    print(f"Tests Passed: {passed}/{total}")
+    return 0 if passed == total else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())